@@ -18,6 +18,8 @@
 
 from numbers import Number
 
+from data.instrumentation import probe
+
 
 class ContainerError(Exception):
     """
@@ -27,6 +29,14 @@ class ContainerError(Exception):
     pass
 
 
+class BucketException(ContainerError):
+    """
+    Exception during bucket operations
+    """
+
+    pass
+
+
 class Container:
     """
     A container maintains statistical data about numerical data added to the container without storing the data itself
@@ -34,6 +44,7 @@ class Container:
     """
 
     def __init__(self) -> None:
+        self._store_values = False
         self._total = 0
         self._count = 0
         self._min = None
@@ -145,7 +156,7 @@ class Container:
             self._min = value
         if self._max is None or value > self._max:
             self._max = value
-        if self.store_values:
+        if self._store_values:
             super().append(value)
 
     def assert_count(self) -> None:
@@ -156,13 +167,15 @@ class Container:
         if self._count == 0:
             raise BucketException("Cannot operate on an empty bucket")
 
-    def store_values(self) -> book:
+    @property
+    def store_values(self) -> bool:
         """
         Get the store_values
         :return: _store_values
         """
         return self._store_values
 
+    @property
     def total(self):
         """
         Get the total
@@ -231,6 +244,20 @@ class Bucket(list):
         self._min = None
         self._max = None
 
+    @classmethod
+    def from_statistics(cls, count: int, total, minimum, maximum):
+        """
+        Create a bucket from statistics gathered elsewhere, e.g. by data.instrumentation.Statistic. No values are stored
+        :param count: number of values
+        :param total: sum of the values
+        :param minimum: minimal value, None if count is 0
+        :param maximum: maximal value, None if count is 0
+        :return: Bucket
+        """
+        ret = cls()
+        ret._count, ret._total, ret._min, ret._max = count, total, minimum, maximum
+        return ret
+
     def __repr__(self) -> str:
         list_str = f": {super()}" if self._store_values else ""
         return f"Bucket(#{self._count},T={self._total},min={self._min},max={self._max})  {list_str})"
@@ -247,6 +274,7 @@ class Bucket(list):
         """
         return self._total == other._total and self._count == other._count and self._min == other._min and self._max == other.max and self._store_values == other._store_values and (not  self._store_values or self.super() == other.super())
 
+    @probe("Bucket.append", rows=lambda args, result: 1)
     def append(self, value: Number) -> None:
         """
         Add a numeric value
@@ -258,7 +286,7 @@ class Bucket(list):
             self._min = value
         if self._max is None or value > self._max:
             self._max = value
-        if self.store_values:
+        if self._store_values:
             super().append(value)
 
     def assert_count(self) -> None:
@@ -269,13 +297,15 @@ class Bucket(list):
         if self._count == 0:
             raise BucketException("Cannot operate on an empty bucket")
 
-    def store_values(self) -> book:
+    @property
+    def store_values(self) -> bool:
         """
         Get the store_values
         :return: _store_values
         """
         return self._store_values
 
+    @property
     def total(self):
         """
         Get the total
@@ -330,6 +360,67 @@ class Bucket(list):
         self._count += other.count
         self._total += other.total
 
+    def merge(self, other):
+        """
+        Add the values of another bucket to this one, e.g. to combine buckets filled in parallel
+        :param other: Bucket to merge
+        :return: self
+        """
+        if self._store_values != other.store_values:
+            raise BucketException("Cannot merge buckets with and without stored values")
+        if other.count():
+            if self._count == 0 or other.min() < self._min:
+                self._min = other.min()
+            if self._count == 0 or other.max() > self._max:
+                self._max = other.max()
+            self._count += other.count()
+            self._total += other.total
+            if self._store_values:
+                list.extend(self, other)
+        return self
+
+    def assert_values(self) -> None:
+        """
+        Helper function that raises an Exception when the values are not stored or the bucket is empty.
+        Order statistics like median and percentiles need the individual values
+        """
+        if not self._store_values:
+            raise BucketException("Values are not stored in this bucket")
+        self.assert_count()
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Get a percentile of the stored values, interpolating linearly between the two nearest values
+        :param percentile: Percentile in [0, 100]
+        :return: value
+        """
+        self.assert_values()
+        if not 0 <= percentile <= 100:
+            raise BucketException("Percentile must be in [0,100]")
+        values = sorted(self)
+        position = (len(values) - 1) * percentile / 100
+        low = int(position)
+        high = min(low + 1, len(values) - 1)
+        return values[low] + (values[high] - values[low]) * (position - low)
+
+    def median(self) -> float:
+        """
+        Get the median of the stored values
+        :return: median
+        """
+        return self.percentile(50)
+
+    def mad(self) -> float:
+        """
+        Get the median absolute deviation of the stored values, a spread measure that is robust against outliers
+        :return: median of the absolute differences with the median
+        """
+        median = self.median()
+        deviations = Bucket(store_values=True)
+        for value in self:
+            deviations.append(abs(value - median))
+        return deviations.median()
+
 
 # class BucketList(dict):
 #     """
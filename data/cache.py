@@ -0,0 +1,317 @@
+""" 
+This file is part of tolyn.    
+
+tolyn is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+       
+"""
+
+from collections import OrderedDict
+from contextlib import nullcontext
+from functools import wraps
+from threading import RLock
+from time import monotonic
+
+from data.dict import Dict, DictException
+
+MEMOIZE_SIZE = 128  # default max_size of a memoize cache
+_MISS = object()
+
+
+class CacheException(DictException):
+    """
+    General Cache exception
+    """
+    pass
+
+
+class Cache(Dict):
+    """
+    Dict with LRU eviction, bounded by number of entries and/or total weight, and an optional time to live per entry.
+    Reading an entry (get, [], setdefault) makes it the most recently used one. The LRU order is kept in an OrderedDict
+    next to the entries, iterating the cache gives the entries in insertion order. Expired entries are dropped when
+    they are accessed or by purge(); iterating the keys may still show them.
+    All operations are O(1), eviction is O(1) per evicted entry.
+    """
+
+    def __init__(self, max_size: int = None, max_weight: float = None, weigher=None, ttl: float = None,
+                 thread_safe: bool = False, clock=monotonic) -> None:
+        """
+        :param max_size: maximum number of entries, None for unbounded
+        :param max_weight: maximum total weight of the entries, None for unbounded
+        :param weigher: function(key, value) -> weight of an entry, default 1 per entry
+        :param ttl: default time to live of an entry in seconds, None for no expiry
+        :param thread_safe: If true, all operations are serialized by a lock
+        :param clock: time function for the time to live
+        """
+        super().__init__()
+        if max_size is not None and max_size < 0:
+            raise CacheException(f"max_size must not be negative: {max_size}")
+        if max_weight is not None and max_weight < 0:
+            raise CacheException(f"max_weight must not be negative: {max_weight}")
+        self.max_size = max_size
+        self.max_weight = max_weight
+        self.weigher = weigher
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = RLock() if thread_safe else nullcontext()
+        self.order = OrderedDict()  # key -> None, least recently used first
+        self.weights = dict()  # key -> weight, only with a weigher
+        self._weight = 0
+        self.expires = dict()  # key -> expiry time, only for entries with a time to live
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __repr__(self) -> str:
+        return f"Cache({len(self)} entries, hits={self.hits}, misses={self.misses}, evictions={self.evictions})"
+
+    @property
+    def weight(self):
+        """
+        Total weight of the entries, the number of entries without a weigher
+        """
+        return len(self) if self.weigher is None else self._weight
+
+    def _expired(self, key) -> bool:
+        """
+        Drop key if its time to live has passed
+        :param key: key present in the cache
+        :return: True if the entry was expired and dropped
+        """
+        expires = self.expires.get(key)
+        if expires is None or expires > self.clock():
+            return False
+        self._discard(key)
+        return True
+
+    def _discard(self, key):
+        """
+        Remove an entry and its bookkeeping
+        :param key: key present in the cache
+        :return: value of the entry
+        """
+        self._invalidate()
+        del self.order[key]
+        self.expires.pop(key, None)
+        if self.weigher is not None:
+            self._weight -= self.weights.pop(key)
+        return dict.pop(self, key)
+
+    def _evict(self) -> None:
+        """
+        Remove least recently used entries until the cache is within its bounds
+        """
+        while len(self) and ((self.max_size is not None and len(self) > self.max_size) or
+                             (self.max_weight is not None and self.weight > self.max_weight)):
+            self._discard(next(iter(self.order)))
+            self.evictions += 1
+
+    def put(self, key, value, ttl: float = None) -> None:
+        """
+        Add or replace an entry and make it the most recently used one
+        :param key: key
+        :param value: value
+        :param ttl: time to live in seconds, overrides the default of the cache
+        """
+        with self.lock:
+            if dict.__contains__(self, key):
+                self._discard(key)
+            self._invalidate()
+            dict.__setitem__(self, key, value)
+            self.order[key] = None
+            ttl = self.ttl if ttl is None else ttl
+            if ttl is not None:
+                self.expires[key] = self.clock() + ttl
+            if self.weigher is not None:
+                weight = self.weigher(key, value)
+                self.weights[key] = weight
+                self._weight += weight
+            self._evict()
+
+    def get(self, key, default=None):
+        """
+        Look up an entry, counting a hit or a miss
+        :param key: key
+        :param default: value returned on a miss
+        :return: value or default
+        """
+        with self.lock:
+            if not dict.__contains__(self, key) or (self.expires and self._expired(key)):
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.order.move_to_end(key)
+            return dict.__getitem__(self, key)
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISS)
+        if value is _MISS:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value) -> None:
+        self.put(key, value)
+
+    def __delitem__(self, key) -> None:
+        with self.lock:
+            if not dict.__contains__(self, key):
+                raise KeyError(key)
+            self._discard(key)
+
+    def __contains__(self, key) -> bool:
+        with self.lock:
+            return dict.__contains__(self, key) and not (self.expires and self._expired(key))
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def pop(self, key, *args):
+        with self.lock:
+            if key in self:
+                return self._discard(key)
+            if args:
+                return args[0]
+            raise KeyError(key)
+
+    def popitem(self):
+        with self.lock:
+            if not len(self):
+                raise KeyError("popitem(): cache is empty")
+            key = next(reversed(self.order))
+            return key, self.pop(key)
+
+    def setdefault(self, key, default=None):
+        with self.lock:
+            value = self.get(key, _MISS)
+            if value is _MISS:
+                self.put(key, default)
+                value = default
+            return value
+
+    def update(self, *args, **kwargs) -> None:
+        with self.lock:
+            for key, value in dict(*args, **kwargs).items():
+                self.put(key, value)
+
+    def update_from_pairs(self, pairs=None, keys=None, values=None) -> None:
+        with self.lock:
+            if pairs is None:
+                if keys is None or values is None or len(keys) != len(values):
+                    raise CacheException("keys and values must both be given with the same length")
+                pairs = zip(keys, values)
+            for key, value in pairs:
+                self.put(key, value)
+
+    def pop_many(self, keys, default=_MISS, raise_if_not_empty: bool = False) -> list:
+        with self.lock:
+            keys = list(keys)
+            if default is _MISS:
+                self._missing_keys(keys)
+                ret = [self.pop(key) for key in keys]
+            else:
+                ret = [self.pop(key, default) for key in keys]
+            if raise_if_not_empty and len(self):
+                raise DictException(f"Dict is not empty after popping the keys: {self} ")
+            return ret
+
+    def remove_many(self, keys, ignore_missing: bool = False, raise_if_not_empty: bool = False) -> None:
+        with self.lock:
+            keys = list(keys)
+            if not ignore_missing:
+                self._missing_keys(keys)
+            for key in keys:
+                self.pop(key, None)
+            if raise_if_not_empty and len(self):
+                raise DictException(f"Dict is not empty after removing the keys: {self} ")
+
+    def clear(self) -> None:
+        with self.lock:
+            Dict.clear(self)
+            self.order.clear()
+            self.weights.clear()
+            self.expires.clear()
+            self._weight = 0
+
+    def purge(self) -> int:
+        """
+        Drop all expired entries
+        :return: number of entries dropped
+        """
+        with self.lock:
+            now = self.clock()
+            expired = [key for key, expires in self.expires.items() if expires <= now]
+            for key in expired:
+                self._discard(key)
+            return len(expired)
+
+    def counters(self) -> dict:
+        """
+        :return: dict with hits, misses, evictions, size and weight
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self),
+                "weight": self.weight}
+
+    def reset_counters(self) -> None:
+        """
+        Set hits, misses and evictions back to 0
+        """
+        self.hits = self.misses = self.evictions = 0
+
+
+def _make_key(args: tuple, kwargs: dict):
+    """
+    Default memoize key: the positional arguments, plus the sorted keyword arguments if there are any
+    """
+    if kwargs:
+        return args, tuple(sorted(kwargs.items()))
+    return args
+
+
+def memoize(max_size: int = MEMOIZE_SIZE, ttl: float = None, cache: Cache = None, key=None, **kwargs):
+    """
+    Decorator that caches the results of a function in a Cache. The cache is available as the attribute cache of the
+    decorated function. Arguments must be hashable, or a key function must be given.
+    :param max_size: maximum number of cached results
+    :param ttl: time to live of a result in seconds
+    :param cache: Cache to use, overrides max_size, ttl and kwargs
+    :param key: function(*args, **kwargs) -> cache key
+    :param kwargs: other Cache parameters, like thread_safe or max_weight
+    :return: decorator
+    """
+    if cache is None:
+        cache = Cache(max_size=max_size, ttl=ttl, **kwargs)
+    make_key = _make_key if key is None else lambda args, kwargs: key(*args, **kwargs)
+
+    def decorator(func):
+        @wraps(func)
+        def inner(*args, **kwargs):
+            """
+            look up the result, call func on a miss
+            """
+            cache_key = make_key(args, kwargs)
+            value = cache.get(cache_key, _MISS)
+            if value is _MISS:
+                value = func(*args, **kwargs)
+                cache.put(cache_key, value)
+            return value
+
+        inner.cache = cache
+        return inner
+
+    return decorator
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
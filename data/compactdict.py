@@ -0,0 +1,444 @@
+""" 
+This file is part of tolyn.    
+
+tolyn is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+       
+"""
+
+import mmap
+import struct
+from array import array
+from zlib import crc32
+
+from data.dict import DictException, KeyNotFoundException
+
+MAGIC = b"TOLYNCD1"
+HEADER = struct.Struct("<8s2sqqq")  # magic, value typecode, entries, blob size, table size
+ALIGNMENT = 8
+INITIAL_TABLE_SIZE = 8
+MAX_LOAD = 2 / 3  # fraction of used table slots (live and removed entries) before the table is rebuilt
+ENCODING = "utf-8"
+
+
+class CompactDictException(DictException):
+    """
+    General CompactDict exception
+    """
+    pass
+
+
+class FrozenException(CompactDictException):
+    """
+    A frozen CompactDict is modified
+    """
+    pass
+
+
+def _table_size(entries: int) -> int:
+    """
+    :param entries: number of entries to hold
+    :return: power of 2 table size that keeps the load below MAX_LOAD
+    """
+    size = INITIAL_TABLE_SIZE
+    while size * MAX_LOAD <= entries:
+        size *= 2
+    return size
+
+
+def _padding(position: int) -> bytes:
+    """
+    :param position: file position
+    :return: zero bytes up to the next ALIGNMENT boundary
+    """
+    return bytes(-position % ALIGNMENT)
+
+
+class CompactDict:
+    """
+    Memory efficient mapping of str keys to numbers (ints by default)
+    Keys are stored utf-8 encoded in one contiguous blob with an offsets array, values in a typed array. Lookups use
+    open addressing (linear probing) over a table of entry numbers and a crc32 hash per entry, so the layout does not
+    depend on the hash seed of the process and can be saved and memory mapped.
+    Removed entries are marked dead and dropped when the table is rebuilt. A frozen CompactDict can't be modified.
+    Per entry this costs about 45 bytes including a short key, against 120+ bytes for a dict with str keys and int
+    values. Lookups are done in Python, so they are slower than a dict.
+    """
+
+    def __init__(self, items=None, typecode: str = "q") -> None:
+        """
+        :param items: dict or iterable of (key, value) pairs to start with
+        :param typecode: array typecode of the values
+        """
+        self.typecode = typecode
+        self._blob = bytearray()
+        self._offsets = array("q", [0])  # key i is blob[offsets[i]:offsets[i + 1]]
+        self._values = array(typecode)
+        self._hashes = array("I")
+        self._alive = bytearray()  # 1 for live entries, 0 for removed ones
+        self._table = array("q", bytes(8 * INITIAL_TABLE_SIZE))  # entry number + 1, 0 for an empty slot
+        self._count = 0
+        self._frozen = False
+        self._mmap = None
+        self._keys = None  # cached keys_snapshot()
+        self._values_list = None  # cached values_snapshot()
+        if items is not None:
+            self.update_from_pairs(items.items() if isinstance(items, dict) else items)
+
+    def __repr__(self) -> str:
+        frozen = ", frozen" if self._frozen else ""
+        return f"CompactDict({self._count} entries{frozen})"
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def frozen(self) -> bool:
+        return self._frozen
+
+    @staticmethod
+    def _encode(key) -> bytes:
+        """
+        :param key: str key
+        :return: encoded key
+        """
+        if not isinstance(key, str):
+            raise CompactDictException(f"Keys must be str, not {type(key)}: {key}")
+        return key.encode(ENCODING)
+
+    def _find(self, encoded: bytes, hashed: int) -> tuple:
+        """
+        Probe the table for a key
+        :param encoded: encoded key
+        :param hashed: crc32 of encoded
+        :return: (slot, entry number), entry number is -1 if the key is not present and slot is then the empty slot
+        """
+        table, hashes, alive, offsets, blob = self._table, self._hashes, self._alive, self._offsets, self._blob
+        mask = len(table) - 1
+        slot = hashed & mask
+        while True:
+            entry = table[slot] - 1
+            if entry < 0:
+                return slot, -1
+            if hashes[entry] == hashed and alive[entry] and blob[offsets[entry]:offsets[entry + 1]] == encoded:
+                return slot, entry
+            slot = (slot + 1) & mask
+
+    def _entry(self, key) -> int:
+        """
+        :param key: str key
+        :return: entry number, -1 if not present
+        """
+        encoded = self._encode(key)
+        return self._find(encoded, crc32(encoded))[1]
+
+    def _check_frozen(self) -> None:
+        if self._frozen:
+            raise FrozenException("CompactDict is frozen")
+        self._keys = self._values_list = None
+
+    def _rebuild(self, entries: int) -> None:
+        """
+        Drop removed entries and rebuild the table
+        :param entries: number of entries the new table should hold
+        """
+        if self._count != len(self._values):
+            blob, offsets = bytearray(), array("q", [0])
+            values, hashes = array(self.typecode), array("I")
+            for entry in range(len(self._values)):
+                if self._alive[entry]:
+                    blob += self._blob[self._offsets[entry]:self._offsets[entry + 1]]
+                    offsets.append(len(blob))
+                    values.append(self._values[entry])
+                    hashes.append(self._hashes[entry])
+            self._blob, self._offsets, self._values, self._hashes = blob, offsets, values, hashes
+            self._alive = bytearray(b"\x01") * self._count
+        size = _table_size(entries)
+        table = array("q", bytes(8 * size))
+        mask = size - 1
+        for entry, hashed in enumerate(self._hashes):
+            slot = hashed & mask
+            while table[slot]:
+                slot = (slot + 1) & mask
+            table[slot] = entry + 1
+        self._table = table
+
+    def _put(self, encoded: bytes, value) -> None:
+        """
+        Add or replace an entry, the caller checks frozen
+        :param encoded: encoded key
+        :param value: value
+        """
+        hashed = crc32(encoded)
+        slot, entry = self._find(encoded, hashed)
+        if entry >= 0:
+            self._values[entry] = value
+            return
+        self._values.append(value)
+        entry = len(self._hashes)
+        self._hashes.append(hashed)
+        self._blob += encoded
+        self._offsets.append(len(self._blob))
+        self._alive.append(1)
+        self._count += 1
+        if entry + 1 >= len(self._table) * MAX_LOAD:
+            self._rebuild(self._count + 1)
+        else:
+            self._table[slot] = entry + 1
+
+    def _remove(self, entry: int) -> None:
+        """
+        Mark an entry as removed, its table slot keeps the probe chain intact until the next rebuild
+        :param entry: entry number
+        """
+        self._alive[entry] = 0
+        self._count -= 1
+
+    def __getitem__(self, key):
+        entry = self._entry(key)
+        if entry < 0:
+            raise KeyError(key)
+        return self._values[entry]
+
+    def __setitem__(self, key, value) -> None:
+        self._check_frozen()
+        self._put(self._encode(key), value)
+
+    def __delitem__(self, key) -> None:
+        self._check_frozen()
+        entry = self._entry(key)
+        if entry < 0:
+            raise KeyError(key)
+        self._remove(entry)
+
+    def __contains__(self, key) -> bool:
+        return isinstance(key, str) and self._entry(key) >= 0
+
+    def __iter__(self):
+        return self.keys()
+
+    def get(self, key, default=None):
+        """
+        :param key: str key
+        :param default: value if key is not present
+        :return: value or default
+        """
+        entry = self._entry(key)
+        return default if entry < 0 else self._values[entry]
+
+    def pop(self, key, *args):
+        """
+        Remove an entry
+        :param key: str key
+        :param args: optional default value if key is not present, otherwise KeyError is raised
+        :return: value
+        """
+        self._check_frozen()
+        entry = self._entry(key)
+        if entry < 0:
+            if args:
+                return args[0]
+            raise KeyError(key)
+        self._remove(entry)
+        return self._values[entry]
+
+    def keys(self):
+        """
+        :return: iterator over the keys in insertion order
+        """
+        blob, offsets, alive = self._blob, self._offsets, self._alive
+        return (str(blob[offsets[entry]:offsets[entry + 1]], ENCODING)
+                for entry in range(len(self._values)) if alive[entry])
+
+    def values(self):
+        """
+        :return: iterator over the values in insertion order
+        """
+        alive = self._alive
+        return (value for entry, value in enumerate(self._values) if alive[entry])
+
+    def items(self):
+        """
+        :return: iterator over (key, value) in insertion order
+        """
+        return zip(self.keys(), self.values())
+
+    def keys_snapshot(self) -> tuple:
+        """
+        Return the decoded keys in a tuple, cached until the dict changes
+        :return: tuple of keys
+        """
+        if self._keys is None:
+            self._keys = tuple(self.keys())
+        return self._keys
+
+    def values_snapshot(self) -> tuple:
+        """
+        Return the values in a tuple, cached until the dict changes
+        :return: tuple of values
+        """
+        if self._values_list is None:
+            self._values_list = tuple(self.values())
+        return self._values_list
+
+    def keyslist(self) -> list:
+        """
+        Return the keys in a new list, copied from the cached snapshot
+        :return: list of keys
+        """
+        return list(self.keys_snapshot())
+
+    def valueslist(self) -> list:
+        """
+        Return the values in a new list, copied from the cached snapshot
+        :return: list of values
+        """
+        return list(self.values_snapshot())
+
+    def remove_keys(self, *args, raise_if_not_empty: bool = False) -> None:
+        """
+        Remove entries based on their key
+        :param raise_if_not_empty: If true, a KeyError is raised if entries remain afterwards
+        :param args: keys to remove, a missing key raises KeyError
+        """
+        for arg in args:
+            self.pop(arg)
+        if raise_if_not_empty and self._count:
+            raise KeyError(f"CompactDict is not empty after removing the keys: {self} ")
+
+    def remove_many(self, keys, ignore_missing: bool = False, raise_if_not_empty: bool = False) -> None:
+        """
+        Remove a batch of entries. Unless ignore_missing, all keys are validated first, so nothing is removed when one
+        is missing
+        :param keys: iterable of keys to remove
+        :param ignore_missing: If true, keys that are not present are skipped
+        :param raise_if_not_empty: If true, a DictException is raised if entries remain afterwards
+        """
+        self._check_frozen()
+        keys = keys if isinstance(keys, (list, tuple)) else list(keys)
+        entries = [self._entry(key) for key in keys]
+        if not ignore_missing and -1 in entries:
+            raise KeyNotFoundException(f"Keys not found: {[key for key, entry in zip(keys, entries) if entry < 0]}")
+        for entry in set(entries):
+            if entry >= 0:
+                self._remove(entry)
+        if raise_if_not_empty and self._count:
+            raise DictException(f"CompactDict is not empty after removing the keys: {self} ")
+
+    def update_from_pairs(self, pairs=None, keys=None, values=None) -> None:
+        """
+        Bulk insert, either from an iterable of (key, value) pairs or from two parallel sequences (lists, arrays)
+        :param pairs: iterable of (key, value) pairs
+        :param keys: sequence of keys, used together with values
+        :param values: sequence of values, same length as keys
+        """
+        if pairs is None:
+            if keys is None or values is None:
+                raise DictException("Both keys and values are needed")
+            if len(keys) != len(values):
+                raise DictException(f"keys and values differ in length: {len(keys)} != {len(values)}")
+            pairs = zip(keys, values)
+        elif keys is not None or values is not None:
+            raise DictException("Give either pairs or keys and values")
+        self._check_frozen()
+        encode = self._encode
+        for key, value in pairs:
+            self._put(encode(key), value)
+
+    def freeze(self) -> None:
+        """
+        Drop removed entries and make the CompactDict read only
+        """
+        if not self._frozen:
+            self._rebuild(self._count)
+            self._frozen = True
+
+    def nbytes(self) -> int:
+        """
+        :return: bytes used by the arrays, without object overhead
+        """
+        return (len(self._blob) + len(self._offsets) * 8 + len(self._values) * self._values.itemsize +
+                len(self._hashes) * 4 + len(self._alive) + len(self._table) * 8)
+
+    def save(self, filename: str) -> None:
+        """
+        Write the CompactDict to a file that load() can memory map. The CompactDict is frozen first. The file uses the
+        native byte order
+        :param filename: name of the file
+        """
+        self.freeze()
+        sections = (self._offsets, self._values, self._hashes, self._table, self._blob)
+        with open(filename, "wb") as file:
+            position = file.write(HEADER.pack(MAGIC, self.typecode.encode().ljust(2), self._count, len(self._blob),
+                                              len(self._table)))
+            for section in sections:
+                position += file.write(_padding(position))
+                position += file.write(memoryview(section).cast("B"))
+
+    @classmethod
+    def load(cls, filename: str, use_mmap: bool = True):
+        """
+        Read a file written by save()
+        :param filename: name of the file
+        :param use_mmap: If true, the file is memory mapped instead of read, which makes loading instant
+        :return: frozen CompactDict
+        """
+        with open(filename, "rb") as file:
+            if use_mmap:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = file.read()
+        if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+            if use_mmap:
+                data.close()
+            raise CompactDictException(f"{filename} is not a CompactDict file")
+        magic, typecode, count, blob_size, table_size = HEADER.unpack_from(data)
+        ret = cls(typecode=typecode.decode().strip())
+        view = memoryview(data)
+        position = HEADER.size
+
+        def section(typecode: str, length: int):
+            nonlocal position
+            position += -position % ALIGNMENT
+            size = length * array(typecode).itemsize
+            if position + size > len(data):
+                raise CompactDictException(f"{filename} is truncated")
+            part = view[position:position + size]
+            position += size
+            if typecode == "B":
+                return part if use_mmap else bytearray(part)
+            return part.cast(typecode) if use_mmap else array(typecode, part.tobytes())
+
+        ret._offsets = section("q", count + 1)
+        ret._values = section(ret.typecode, count)
+        ret._hashes = section("I", count)
+        ret._table = section("q", table_size)
+        ret._blob = section("B", blob_size)
+        ret._alive = b"\x01" * count
+        ret._count = count
+        ret._frozen = True
+        ret._mmap = data if use_mmap else None
+        return ret
+
+    def close(self) -> None:
+        """
+        Release the memory map of a loaded CompactDict, it can't be used afterwards
+        """
+        if self._mmap is not None:
+            self._offsets = self._values = self._hashes = self._table = self._blob = None
+            self._mmap.close()
+            self._mmap = None
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
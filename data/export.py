@@ -0,0 +1,172 @@
+"""
+    This file is part of tolyn.
+
+    tolyn is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import csv
+import json
+import os
+from collections import deque
+from threading import Event, Lock, Thread, get_ident
+
+
+class ExportError(Exception):
+    """
+    Specific Error for exporting timing data
+    """
+    pass
+
+
+class SpanSink:
+    """
+    Base class for streaming timing data to a file.
+    Spans are appended to a bounded ring buffer (deque.append is thread safe, no lock is taken); a background thread
+    writes the buffer to file every flush_interval seconds. If the buffer is full, the oldest spans are dropped and
+    counted, so a slow disk never blocks or grows the measured process.
+    """
+
+    def __init__(self, filename: str, capacity: int = 100000, flush_interval: float = 1.0) -> None:
+        """
+        :param filename: full path and filename of the output
+        :param capacity: maximal number of buffered spans
+        :param flush_interval: seconds between two writes, None or 0 to write only on flush() and close()
+        """
+        if capacity < 1:
+            raise ExportError("capacity must be at least 1")
+        self.filename = filename
+        self.buffer = deque(maxlen=capacity)
+        self.dropped = 0
+        self.written = 0
+        self._lock = Lock()  # serializes writing, not recording
+        self._file = open(filename, "wt", newline="")
+        self._write_header()
+        self._stopping = Event()
+        self._thread = None
+        if flush_interval:
+            self._thread = Thread(target=self._run, args=(flush_interval,), name=f"{self.__class__.__name__}", daemon=True)
+            self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def record(self, name: str, start_ns: int, duration_ns: int, category: str = "", thread_id: int = None) -> None:
+        """
+        Add a span
+        :param name: name of the span
+        :param start_ns: start time in ns
+        :param duration_ns: duration in ns
+        :param category: optional category
+        :param thread_id: thread the span belongs to, default the current thread
+        """
+        buffer = self.buffer
+        if len(buffer) == buffer.maxlen:
+            self.dropped += 1
+        buffer.append((name, category, start_ns, duration_ns, get_ident() if thread_id is None else thread_id))
+
+    def _run(self, interval: float) -> None:
+        while not self._stopping.wait(interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write all buffered spans to file
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            buffer = self.buffer
+            records = []
+            while buffer:
+                records.append(buffer.popleft())
+            if records:
+                self._write(records)
+                self.written += len(records)
+            self._file.flush()
+
+    def close(self) -> None:
+        """
+        Stop the background thread, write the remaining spans and close the file
+        """
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._write_footer()
+                self._file.close()
+                self._file = None
+
+    def _write_header(self) -> None:
+        pass
+
+    def _write(self, records: list) -> None:
+        raise NotImplementedError()
+
+    def _write_footer(self) -> None:
+        pass
+
+
+class ChromeTraceSink(SpanSink):
+    """
+    Writes spans in the Chrome Trace Event format (JSON array of complete events), which can be opened in
+    chrome://tracing or Perfetto
+    """
+
+    def __init__(self, filename: str, capacity: int = 100000, flush_interval: float = 1.0) -> None:
+        self._pid = os.getpid()
+        self._first = True
+        SpanSink.__init__(self, filename, capacity, flush_interval)
+
+    def _write_header(self) -> None:
+        self._file.write("[")
+
+    def _write(self, records: list) -> None:
+        lines = []
+        for name, category, start_ns, duration_ns, thread_id in records:
+            event = {"name": name, "cat": category, "ph": "X", "ts": start_ns / 1000, "dur": duration_ns / 1000, "pid": self._pid, "tid": thread_id}
+            lines.append(json.dumps(event))
+        separator = "," + os.linesep
+        self._file.write(("" if self._first else separator) + separator.join(lines))
+        self._first = False
+
+    def _write_footer(self) -> None:
+        self._file.write("]" + os.linesep)
+
+
+class CsvSink(SpanSink):
+    """
+    Writes spans as CSV: name, category, start_ns, duration_ns, thread
+    """
+
+    def __init__(self, filename: str, capacity: int = 100000, flush_interval: float = 1.0, separator: str = ';') -> None:
+        self._separator = separator
+        SpanSink.__init__(self, filename, capacity, flush_interval)
+
+    def _write_header(self) -> None:
+        self._writer = csv.writer(self._file, delimiter=self._separator)
+        self._writer.writerow(["name", "category", "start_ns", "duration_ns", "thread"])
+
+    def _write(self, records: list) -> None:
+        self._writer.writerows(records)
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
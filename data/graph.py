@@ -16,6 +16,11 @@
 
 """
 
+import heapq
+import math
+from array import array
+
+
 class GraphException(Exception):
     """
     Graph related exceptions
@@ -78,11 +83,355 @@ class Graph:
         edge.end.incoming.add(edge.start)
 
 
+class CompactGraph:
+    """
+    Compact graph that maps nodes to integer ids and keeps the adjacency in CSR (compressed sparse row) form.
+    Edges are collected in typed arrays, the CSR index is (re)built lazily by a counting sort in O(V + E).
+    Any hashable value can be used as node, e.g. a component id.
+    """
+
+    def __init__(self, directed: bool = True, weighted: bool = False) -> None:
+        """
+        :param directed: If False, every edge can be followed in both directions
+        :param weighted: If True, a weight is stored for every edge
+        """
+        self.directed = directed
+        self.weighted = weighted
+        self._ids = dict()  # node -> id
+        self._nodes = []  # id -> node
+        self._sources = array('i')
+        self._targets = array('i')
+        self._weights = array('d') if weighted else None
+        self._forward = None  # (offsets, targets, weights) or None if edges were added since the last build
+        self._backward = None
+
+    def __repr__(self) -> str:
+        return f"CompactGraph(nodes={self.node_count()}, edges={self.edge_count()}, directed={self.directed})"
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node) -> bool:
+        return node in self._ids
+
+    def node_count(self) -> int:
+        """
+        Get the number of nodes
+        :return: number of nodes
+        """
+        return len(self._nodes)
+
+    def edge_count(self) -> int:
+        """
+        Get the number of edges as they were added
+        :return: number of edges
+        """
+        return len(self._sources)
+
+    def add_node(self, node) -> int:
+        """
+        Add a node if it is not yet known
+        :param node: Any hashable value
+        :return: id of the node
+        """
+        node_id = self._ids.get(node)
+        if node_id is None:
+            node_id = self._ids[node] = len(self._nodes)
+            self._nodes.append(node)
+            self._forward = self._backward = None
+        return node_id
+
+    def node_id(self, node) -> int:
+        """
+        Get the id of a node
+        :param node: node
+        :return: id of the node
+        """
+        try:
+            return self._ids[node]
+        except KeyError:
+            raise GraphException(f"Unknown node {node}")
+
+    def node(self, node_id: int):
+        """
+        Get the node of an id
+        :param node_id: id
+        :return: node
+        """
+        return self._nodes[node_id]
+
+    def add_edge(self, start, end, weight: float = 1.0) -> None:
+        """
+        Add an edge between two nodes, unknown nodes are added
+        :param start: start node
+        :param end: end node
+        :param weight: weight, ignored if the graph is not weighted
+        """
+        self._sources.append(self.add_node(start))
+        self._targets.append(self.add_node(end))
+        if self._weights is not None:
+            self._weights.append(weight)
+        self._forward = self._backward = None
+
+    def add_edges(self, edges) -> None:
+        """
+        Add many edges at once
+        :param edges: Iterable of (start, end) or, for weighted graphs, (start, end, weight) tuples
+        """
+        add_node, sources, targets, weights = self.add_node, self._sources, self._targets, self._weights
+        for edge in edges:
+            sources.append(add_node(edge[0]))
+            targets.append(add_node(edge[1]))
+            if weights is not None:
+                weights.append(edge[2] if len(edge) > 2 else 1.0)
+        self._forward = self._backward = None
+
+    def add_edges_from_ids(self, sources, targets, weights=None) -> None:
+        """
+        Add many edges between existing node ids at once, e.g. from arrays loaded from file
+        :param sources: sequence of start node ids
+        :param targets: sequence of end node ids, same length as sources
+        :param weights: sequence of weights, same length as sources. Default weight is 1.0
+        """
+        if len(sources) != len(targets) or (weights is not None and len(weights) != len(sources)):
+            raise GraphException("sources, targets and weights must have the same length")
+        count = len(self._nodes)
+        for ids in (sources, targets):
+            if len(ids) and not (0 <= min(ids) and max(ids) < count):
+                raise GraphException(f"node ids must be in [0, {count}[")
+        self._sources.extend(array('i', sources))
+        self._targets.extend(array('i', targets))
+        if self._weights is not None:
+            self._weights.extend(array('d', weights) if weights is not None else array('d', [1.0]) * len(sources))
+        self._forward = self._backward = None
+
+    def _build(self, sources: array, targets: array) -> tuple:
+        """
+        Create the CSR index of a list of edges with a counting sort
+        :param sources: start node ids
+        :param targets: end node ids
+        :return: offsets, targets and weights (or None) as memoryviews
+        """
+        if not self.directed:
+            sources, targets = sources + targets, targets + sources
+        weights = self._weights
+        if weights is not None and not self.directed:
+            weights = weights + weights
+        offsets = array('q', [0]) * (len(self._nodes) + 1)
+        for source in sources:
+            offsets[source + 1] += 1
+        for i in range(len(self._nodes)):
+            offsets[i + 1] += offsets[i]
+        position = offsets[:-1]
+        adjacency = array('i', [0]) * len(targets)
+        adjacency_weights = array('d', [0.0]) * len(targets) if weights is not None else None
+        for i in range(len(sources)):
+            source = sources[i]
+            j = position[source]
+            position[source] = j + 1
+            adjacency[j] = targets[i]
+            if adjacency_weights is not None:
+                adjacency_weights[j] = weights[i]
+        return memoryview(offsets), memoryview(adjacency), None if adjacency_weights is None else memoryview(adjacency_weights)
+
+    def csr(self) -> tuple:
+        """
+        Get the outgoing adjacency in CSR form: the neighbours of id n are targets[offsets[n]:offsets[n + 1]]
+        :return: offsets, targets and weights (None if not weighted) as read-only memoryviews
+        """
+        if self._forward is None:
+            self._forward = tuple(view if view is None else view.toreadonly() for view in self._build(self._sources, self._targets))
+        return self._forward
+
+    def reverse_csr(self) -> tuple:
+        """
+        Get the incoming adjacency in CSR form, see csr()
+        :return: offsets, sources and weights (None if not weighted) as read-only memoryviews
+        """
+        if not self.directed:
+            return self.csr()
+        if self._backward is None:
+            self._backward = tuple(view if view is None else view.toreadonly() for view in self._build(self._targets, self._sources))
+        return self._backward
+
+    def neighbors(self, node_id: int) -> memoryview:
+        """
+        Get the ids of the nodes that can be reached with one outgoing edge, without copying
+        :param node_id: id
+        :return: memoryview of node ids
+        """
+        offsets, targets, _ = self.csr()
+        return targets[offsets[node_id]:offsets[node_id + 1]]
+
+    def predecessors(self, node_id: int) -> memoryview:
+        """
+        Get the ids of the nodes that have an edge to this node, without copying
+        :param node_id: id
+        :return: memoryview of node ids
+        """
+        offsets, sources, _ = self.reverse_csr()
+        return sources[offsets[node_id]:offsets[node_id + 1]]
+
+    def neighbor_weights(self, node_id: int) -> memoryview:
+        """
+        Get the weights of the outgoing edges, in the same order as neighbors()
+        :param node_id: id
+        :return: memoryview of weights
+        """
+        offsets, _, weights = self.csr()
+        if weights is None:
+            raise GraphException("Graph is not weighted")
+        return weights[offsets[node_id]:offsets[node_id + 1]]
+
+    def degree(self, node_id: int) -> int:
+        """
+        Get the number of outgoing edges
+        :param node_id: id
+        :return: out degree
+        """
+        offsets = self.csr()[0]
+        return offsets[node_id + 1] - offsets[node_id]
+
+    # traversal, all iterative and working on ids and typed arrays
+    def bfs(self, start_id: int, reverse: bool = False, until: int = None) -> array:
+        """
+        Breadth first search
+        :param start_id: id to start from
+        :param reverse: If True, follow the edges backwards
+        :param until: If given, stop as soon as this id is found, it is then the last id of the result
+        :return: ids in the order they are visited
+        """
+        offsets, targets, _ = self.reverse_csr() if reverse else self.csr()
+        visited = bytearray(len(self._nodes))
+        visited[start_id] = 1
+        order = array('i', [start_id])
+        if start_id == until:
+            return order
+        head = 0
+        while head < len(order):
+            node_id = order[head]
+            head += 1
+            for target in targets[offsets[node_id]:offsets[node_id + 1]]:
+                if not visited[target]:
+                    visited[target] = 1
+                    order.append(target)
+                    if target == until:
+                        return order
+        return order
 
+    def dfs(self, start_id: int, reverse: bool = False) -> array:
+        """
+        Depth first search
+        :param start_id: id to start from
+        :param reverse: If True, follow the edges backwards
+        :return: ids in pre-order
+        """
+        offsets, targets, _ = self.reverse_csr() if reverse else self.csr()
+        visited = bytearray(len(self._nodes))
+        order = array('i')
+        stack = array('i', [start_id])
+        while stack:
+            node_id = stack.pop()
+            if visited[node_id]:
+                continue
+            visited[node_id] = 1
+            order.append(node_id)
+            neighbors = targets[offsets[node_id]:offsets[node_id + 1]]
+            for i in range(len(neighbors) - 1, -1, -1):  # reversed, so the first neighbour is visited first
+                if not visited[neighbors[i]]:
+                    stack.append(neighbors[i])
+        return order
 
+    def reachable(self, start_id: int, end_id: int) -> bool:
+        """
+        Determine if there is a path from start to end
+        :param start_id: id of the start node
+        :param end_id: id of the end node
+        :return: True if end can be reached from start
+        """
+        return self.bfs(start_id, until=end_id)[-1] == end_id
 
+    def shortest_paths(self, start_id: int, end_id: int = None) -> tuple:
+        """
+        Dijkstra's algorithm with a binary heap. Unweighted graphs use weight 1 for every edge.
+        :param start_id: id of the start node
+        :param end_id: If given, stop as soon as the shortest path to this node is known
+        :return: distances (inf if not reachable) and predecessors (-1 if none) as arrays indexed by id
+        """
+        offsets, targets, weights = self.csr()
+        distances = array('d', [math.inf]) * len(self._nodes)
+        predecessors = array('i', [-1]) * len(self._nodes)
+        done = bytearray(len(self._nodes))
+        distances[start_id] = 0.0
+        heap = [(0.0, start_id)]
+        while heap:
+            distance, node_id = heapq.heappop(heap)
+            if done[node_id]:
+                continue
+            done[node_id] = 1
+            if node_id == end_id:
+                break
+            for i in range(offsets[node_id], offsets[node_id + 1]):
+                target = targets[i]
+                weight = 1.0 if weights is None else weights[i]
+                if weight < 0:
+                    raise GraphException(f"negative weight {weight} on edge {node_id} -> {target}")
+                candidate = distance + weight
+                if candidate < distances[target]:
+                    distances[target] = candidate
+                    predecessors[target] = node_id
+                    heapq.heappush(heap, (candidate, target))
+        return distances, predecessors
 
+    def shortest_path(self, start_id: int, end_id: int) -> list:
+        """
+        Get the shortest path between two nodes
+        :param start_id: id of the start node
+        :param end_id: id of the end node
+        :return: list of ids from start to end, empty if end can not be reached
+        """
+        distances, predecessors = self.shortest_paths(start_id, end_id)
+        if distances[end_id] == math.inf:
+            return []
+        path = [end_id]
+        while path[-1] != start_id:
+            path.append(predecessors[path[-1]])
+        path.reverse()
+        return path
 
+    def connected_components(self) -> array:
+        """
+        Label the (weakly) connected components with union-find, using path halving and union by size
+        :return: component number per id, components are numbered from 0 in order of their lowest id
+        """
+        count = len(self._nodes)
+        parent = array('i', range(count))
+        size = array('i', [1]) * count
+        sources, targets = self._sources, self._targets
+        for i in range(len(sources)):
+            a = sources[i]
+            while parent[a] != a:
+                parent[a] = a = parent[parent[a]]
+            b = targets[i]
+            while parent[b] != b:
+                parent[b] = b = parent[parent[b]]
+            if a == b:
+                continue
+            if size[a] < size[b]:
+                a, b = b, a
+            parent[b] = a
+            size[a] += size[b]
+        labels = array('i', [-1]) * count
+        next_label = 0
+        for node_id in range(count):
+            root = node_id
+            while parent[root] != root:
+                root = parent[root]
+            if labels[root] < 0:
+                labels[root] = next_label
+                next_label += 1
+            labels[node_id] = labels[root]
+        return labels
 
 
 if __name__ == "__name__":
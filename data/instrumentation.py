@@ -0,0 +1,227 @@
+"""
+    This file is part of tolyn.
+
+    tolyn is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+"""
+Named probes for the hot paths of tolyn.
+A function decorated with @probe(name) is timed only while its probe is enabled.
+- Methods stay undecorated: enable() rebinds the method on its class to a timing wrapper and disable() puts the
+  original back, so a disabled probe costs nothing. This keeps per-value paths like Bucket.append at full speed.
+- Module level functions can be imported by name elsewhere, so rebinding would miss those references. They are wrapped
+  once; a disabled probe then costs an extra call and one attribute check, which is fine for coarse operations.
+If the environment variable TOLYN_INSTRUMENTATION is '0' at import time, the decorator always returns the function
+itself.
+Usage:
+    instrumentation.enable("Matrix.sort")
+    ...
+    print(instrumentation.snapshot()["Matrix.sort"]["duration"].avg())
+"""
+
+import os
+import sys
+from functools import wraps
+from time import perf_counter_ns
+
+ENVIRONMENT_VARIABLE = "TOLYN_INSTRUMENTATION"
+AVAILABLE = os.environ.get(ENVIRONMENT_VARIABLE, "1") != "0"
+
+
+class InstrumentationException(Exception):
+    """
+    Instrumentation related exceptions
+    """
+    pass
+
+
+class Statistic:
+    """
+    Count, total, min and max of numeric values, shared by the probes and the profiler (SpanNode).
+    Bucket.append is itself probed, so probes can not use buckets directly.
+    """
+
+    __slots__ = ("count", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value) -> None:
+        """
+        Add a numeric value
+        :param value: Value to add
+        """
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def bucket(self):
+        """
+        Get the statistics as bucket
+        :return: Bucket with count, total, min and max
+        """
+        from data.bucketlist import Bucket  # bucketlist imports this module for its probe
+        return Bucket.from_statistics(self.count, self.total, self.min, self.max)
+
+
+class Probe:
+    """
+    Named measuring point: number of calls, duration per call (ns) and number of rows handled per call
+    """
+
+    __slots__ = ("name", "enabled", "duration", "rows", "methods")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.enabled = False
+        self.duration = Statistic()
+        self.rows = Statistic()
+        self.methods = []  # (original, timing wrapper) of the methods that are rebound by enable() and disable()
+
+    def __repr__(self) -> str:
+        return f"Probe({self.name}, enabled={self.enabled}, calls={self.duration.count})"
+
+    def reset(self) -> None:
+        """
+        Forget the collected statistics
+        """
+        self.duration = Statistic()
+        self.rows = Statistic()
+
+    def set_enabled(self, enabled: bool) -> None:
+        """
+        Enable or disable the probe and bind the timing wrappers or the original methods
+        :param enabled: True to enable
+        """
+        self.enabled = enabled
+        for original, timed in self.methods:
+            owner = sys.modules[original.__module__]
+            *path, attribute = original.__qualname__.split(".")
+            for part in path:
+                owner = getattr(owner, part)
+            setattr(owner, attribute, timed if enabled else original)
+
+
+PROBES = dict()  # name -> Probe
+
+
+def register(name: str) -> Probe:
+    """
+    Get the probe with a name, create it if needed
+    :param name: name of the probe
+    :return: Probe
+    """
+    ret = PROBES.get(name)
+    if ret is None:
+        ret = PROBES[name] = Probe(name)
+    return ret
+
+
+def probe(name: str, rows=None):
+    """
+    Decorator that adds a probe to a function
+    :param name: name of the probe
+    :param rows: Optional function rows(args, result) that gives the number of rows handled by a call
+    """
+    measuring_point = register(name)
+
+    def decorator(func):
+        if not AVAILABLE:
+            return func
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            start = perf_counter_ns()
+            result = func(*args, **kwargs)
+            measuring_point.duration.add(perf_counter_ns() - start)
+            if rows is not None:
+                measuring_point.rows.add(rows(args, result))
+            return result
+
+        if "." in func.__qualname__ and "<locals>" not in func.__qualname__:
+            measuring_point.methods.append((func, timed))  # a method, rebound by enable() and disable()
+            return func
+
+        @wraps(func)
+        def inner(*args, **kwargs):
+            if measuring_point.enabled:
+                return timed(*args, **kwargs)
+            return func(*args, **kwargs)
+
+        return inner
+
+    return decorator
+
+
+def _select(names) -> list:
+    """
+    Get the probes with the given names, all probes if no names are given
+    :param names: names of probes
+    :return: list of Probe
+    """
+    if not names:
+        return list(PROBES.values())
+    unknown = [name for name in names if name not in PROBES]
+    if unknown:
+        raise InstrumentationException(f"Unknown probes {unknown}")
+    return [PROBES[name] for name in names]
+
+
+def enable(*names) -> None:
+    """
+    Enable probes
+    :param names: names of the probes, all probes if none are given
+    """
+    if not AVAILABLE:
+        raise InstrumentationException(f"Instrumentation was disabled at import time by {ENVIRONMENT_VARIABLE}=0")
+    for measuring_point in _select(names):
+        measuring_point.set_enabled(True)
+
+
+def disable(*names) -> None:
+    """
+    Disable probes, the collected statistics are kept
+    :param names: names of the probes, all probes if none are given
+    """
+    for measuring_point in _select(names):
+        measuring_point.set_enabled(False)
+
+
+def reset(*names) -> None:
+    """
+    Forget the statistics of probes
+    :param names: names of the probes, all probes if none are given
+    """
+    for measuring_point in _select(names):
+        measuring_point.reset()
+
+
+def snapshot() -> dict:
+    """
+    Get the statistics of all probes that have been called
+    :return: dict name -> {"calls": int, "duration": Bucket (ns), "rows": Bucket}
+    """
+    return {name: {"calls": measuring_point.duration.count, "duration": measuring_point.duration.bucket(), "rows": measuring_point.rows.bucket()}
+            for name, measuring_point in PROBES.items() if measuring_point.duration.count}
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
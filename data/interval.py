@@ -17,8 +17,46 @@
 """
 
 
+from array import array
+from bisect import bisect_right
 from typing import Union
 
+# Interval boundaries are mapped to sortable keys (rank, value, side), so that open, closed and infinite boundaries
+# compare as points on one line: rank -1/+1 is -INF/+INF and side -1/0/+1 means just before/at/just after value.
+_MINUS_INFINITY = (-1, 0, 0)
+_PLUS_INFINITY = (1, 0, 0)
+
+
+def _point_key(value) -> tuple:
+    """
+    Sort key of a single value
+    :param value: Any value
+    :return: key
+    """
+    return 0, value, 0
+
+
+def _start_key(interval) -> tuple:
+    """
+    Sort key of the left boundary of an interval
+    :param interval: Interval
+    :return: key
+    """
+    if interval.left is None:
+        return _MINUS_INFINITY
+    return 0, interval.left, 0 if interval.left_inclusive else 1
+
+
+def _end_key(interval) -> tuple:
+    """
+    Sort key of the right boundary of an interval
+    :param interval: Interval
+    :return: key
+    """
+    if interval.right is None:
+        return _PLUS_INFINITY
+    return 0, interval.right, 0 if interval.right_inclusive else -1
+
 class IntervalException(Exception):
     """
     Exceptions specific for the Cave Interval
@@ -58,13 +96,19 @@ class Interval:
         if self.left is None and self.right is None:
             return True
         if self.left is None:
-            if value < self.right or (self.right_inclusive and value == self.right):
-                return True
+            return value < self.right or (self.right_inclusive and value == self.right)
         if self.right is None:
-            if value > self.left or (self.left_inclusive and value == self.left):
-                return True
+            return value > self.left or (self.left_inclusive and value == self.left)
         return (self.left < value < self.right) or (self.left == value and self.left_inclusive) or (self.right == value and self.right_inclusive)
 
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Interval):
+            return False
+        return _start_key(self) == _start_key(other) and _end_key(self) == _end_key(other)
+
+    def __hash__(self) -> int:
+        return hash((_start_key(self), _end_key(self)))
+
     def __repr__(self) -> str:
         ch1 = ']'
         if self.left_inclusive:
@@ -87,16 +131,452 @@ class Interval:
         :param value: Any value
         :return: Value within the current interval
         """
-        if value < self.left:
+        if self.left is not None and value < self.left:
             if not self.left_inclusive:
-                raise FrameworkException(f"Don't know how to reduce value {value} to exclusive left boundary  {self.left} in {self}")
+                raise IntervalException(f"Don't know how to reduce value {value} to exclusive left boundary  {self.left} in {self}")
             return self.left
-        if value > self.right:
+        if self.right is not None and value > self.right:
             if not self.right_inclusive:
-                raise FrameworkException(f"Don't know how to reduce value {value} to exclusive right boundary  {self.right} in {self}")
+                raise IntervalException(f"Don't know how to reduce value {value} to exclusive right boundary  {self.right} in {self}")
             return self.right
         return value
 
+    def reduce_values(self, values):
+        """
+        Reduce many values at once, see reduce_value().
+        min() and max() are determined first, so values that are already inside the interval are copied as-is.
+        :param values: Iterable of values, e.g. a list or an array.array
+        :return: list of values within the current interval, or an array.array of the same type if an array was given
+        """
+        ret = values if isinstance(values, (list, array)) else list(values)
+        if len(ret) == 0:
+            return ret[:]
+        left, right = self.left, self.right
+        low, high = min(ret), max(ret)
+        if left is not None and low < left:
+            if not self.left_inclusive:
+                raise IntervalException(f"Don't know how to reduce value {low} to exclusive left boundary  {left} in {self}")
+        else:
+            left = None
+        if right is not None and high > right:
+            if not self.right_inclusive:
+                raise IntervalException(f"Don't know how to reduce value {high} to exclusive right boundary  {right} in {self}")
+        else:
+            right = None
+        if left is None and right is None:
+            ret = ret[:]
+        elif left is None:
+            ret = [right if value > right else value for value in ret]
+        elif right is None:
+            ret = [left if value < left else value for value in ret]
+        else:
+            ret = [left if value < left else right if value > right else value for value in ret]
+        if isinstance(values, array) and not isinstance(ret, array):
+            ret = array(values.typecode, ret)
+        return ret
+
+    def contains_many(self, values) -> list:
+        """
+        Check for many values at once if they are in the interval
+        :param values: Iterable of values, e.g. a list or an array.array
+        :return: list of booleans, one per value
+        """
+        left, right = self.left, self.right
+        if left is None and right is None:
+            return [True for _ in values]
+        if left is None:
+            if self.right_inclusive:
+                return [value <= right for value in values]
+            return [value < right for value in values]
+        if right is None:
+            if self.left_inclusive:
+                return [left <= value for value in values]
+            return [left < value for value in values]
+        if self.left_inclusive and self.right_inclusive:
+            return [left <= value <= right for value in values]
+        if self.left_inclusive:
+            return [left <= value < right for value in values]
+        if self.right_inclusive:
+            return [left < value <= right for value in values]
+        return [left < value < right for value in values]
+
+
+def _from_keys(start: tuple, end: tuple) -> Interval:
+    """
+    Create an interval from its boundary keys
+    :param start: key of the left boundary
+    :param end: key of the right boundary
+    :return: Interval
+    """
+    left = None if start[0] != 0 else start[1]
+    right = None if end[0] != 0 else end[1]
+    return Interval(left, right, start == (0, left, 0), end == (0, right, 0))
+
+
+def _touches(end: tuple, start: tuple) -> bool:
+    """
+    Determine whether an interval starting at start continues an interval ending at end without a gap
+    :param end: key of the right boundary of the first interval
+    :param start: key of the left boundary of the second interval
+    :return: True if both intervals overlap or are adjacent
+    """
+    return start <= end or (start[0] == end[0] == 0 and start[1] == end[1] and start[2] <= end[2] + 1)
+
+
+def _normalized_keys(intervals) -> list:
+    """
+    Sweep the intervals in order of their left boundary and merge everything that overlaps or touches
+    :param intervals: Iterable of intervals
+    :return: sorted list of (start key, end key) without overlaps
+    """
+    keys = sorted([(_start_key(interval), _end_key(interval)) for interval in intervals])
+    ret = []
+    for start, end in keys:
+        if ret and _touches(ret[-1][1], start):
+            if end > ret[-1][1]:
+                ret[-1] = (ret[-1][0], end)
+        else:
+            ret.append((start, end))
+    return ret
+
+
+def _complement_keys(keys: list) -> list:
+    """
+    Get the gaps between normalized keys
+    :param keys: sorted list of (start key, end key) without overlaps
+    :return: sorted list of (start key, end key) without overlaps
+    """
+    ret = []
+    previous = _MINUS_INFINITY
+    for start, end in keys:
+        if start != _MINUS_INFINITY:
+            ret.append((previous, (0, start[1], start[2] - 1)))
+        if end == _PLUS_INFINITY:
+            return ret
+        previous = (0, end[1], end[2] + 1)
+    ret.append((previous, _PLUS_INFINITY))
+    return ret
+
+
+def _intersection_keys(left: list, right: list) -> list:
+    """
+    Intersect two lists of normalized keys in one merge pass
+    :param left: sorted list of (start key, end key) without overlaps
+    :param right: sorted list of (start key, end key) without overlaps
+    :return: sorted list of (start key, end key) without overlaps
+    """
+    ret = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        start = max(left[i][0], right[j][0])
+        end = min(left[i][1], right[j][1])
+        if start <= end:
+            ret.append((start, end))
+        if left[i][1] < right[j][1]:
+            i += 1
+        else:
+            j += 1
+    return ret
+
+
+def normalize(intervals) -> list:
+    """
+    Merge overlapping and adjacent intervals
+    :param intervals: Iterable of intervals
+    :return: sorted list of intervals without overlaps
+    """
+    return [_from_keys(start, end) for start, end in _normalized_keys(intervals)]
+
+
+def union(left, right) -> list:
+    """
+    All values that are in at least one of the intervals
+    :param left: Iterable of intervals
+    :param right: Iterable of intervals
+    :return: sorted list of intervals without overlaps
+    """
+    return normalize(list(left) + list(right))
+
+
+def intersection(left, right) -> list:
+    """
+    All values that are in both an interval of left and an interval of right
+    :param left: Iterable of intervals
+    :param right: Iterable of intervals
+    :return: sorted list of intervals without overlaps
+    """
+    keys = _intersection_keys(_normalized_keys(left), _normalized_keys(right))
+    return [_from_keys(start, end) for start, end in keys]
+
+
+def difference(remove_from, to_remove) -> list:
+    """
+    All values of remove_from that are in none of the intervals of to_remove
+    :param remove_from: Iterable of intervals
+    :param to_remove: Iterable of intervals
+    :return: sorted list of intervals without overlaps
+    """
+    keys = _intersection_keys(_normalized_keys(remove_from), _complement_keys(_normalized_keys(to_remove)))
+    return [_from_keys(start, end) for start, end in keys]
+
+
+def complement(intervals) -> list:
+    """
+    All values that are in none of the intervals
+    :param intervals: Iterable of intervals
+    :return: sorted list of intervals without overlaps
+    """
+    return [_from_keys(start, end) for start, end in _complement_keys(_normalized_keys(intervals))]
+
+
+class _IntervalNode:
+    """
+    Node of a centered interval tree. It holds the intervals that contain its center.
+    """
+
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, center, by_start: list, by_end: list) -> None:
+        self.center = center  # key of the center, None for a leaf that has to be scanned
+        self.by_start = by_start  # (start key, index) ascending
+        self.by_end = by_end  # (end key, index) descending
+        self.left = None
+        self.right = None
+
+
+class IntervalSet:
+    """
+    Collection of intervals with fast stabbing and overlap queries.
+    The intervals are indexed in a centered interval tree, so that finding the k intervals that contain a value or that
+    overlap another interval costs O(log n + k). The index is (re)built lazily after intervals have been added.
+    """
+
+    def __init__(self, intervals=None) -> None:
+        self._intervals = []
+        self._starts = []
+        self._ends = []
+        self._root = None
+        self._sorted_starts = None  # (start key, index) ascending, None when the index must be rebuilt
+        if intervals is not None:
+            for interval in intervals:
+                self.add(interval)
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def __iter__(self):
+        return iter(self._intervals)
+
+    def __getitem__(self, index: int) -> Interval:
+        return self._intervals[index]
+
+    def __contains__(self, value) -> bool:
+        return len(self.containing_indices(value)) > 0
+
+    def __repr__(self) -> str:
+        return f"IntervalSet{self._intervals}"
+
+    def __or__(self, other):
+        return IntervalSet(union(self, other))
+
+    def __and__(self, other):
+        return IntervalSet(intersection(self, other))
+
+    def __sub__(self, other):
+        return IntervalSet(difference(self, other))
+
+    def __invert__(self):
+        return IntervalSet(complement(self))
+
+    def normalized(self):
+        """
+        Get a copy in which overlapping and adjacent intervals are merged
+        :return: IntervalSet with sorted intervals without overlaps
+        """
+        return IntervalSet(normalize(self))
+
+    def add(self, interval: Interval) -> int:
+        """
+        Add an interval to the set
+        :param interval: Interval to add
+        :return: index of the interval in the set
+        """
+        if not isinstance(interval, Interval):
+            raise IntervalException(f"{interval} is not an Interval")
+        self._intervals.append(interval)
+        self._starts.append(_start_key(interval))
+        self._ends.append(_end_key(interval))
+        self._sorted_starts = None
+        return len(self._intervals) - 1
+
+    def _build(self) -> None:
+        """
+        Build the interval tree and the sorted start keys
+        """
+        self._sorted_starts = sorted(zip(self._starts, range(len(self._starts))))
+        self._root = self._build_node(list(range(len(self._intervals)))) if self._intervals else None
+
+    def _build_node(self, indices: list) -> _IntervalNode:
+        """
+        Build the (sub)tree for a list of interval indices, without recursion
+        :param indices: intervals to put in the tree
+        :return: root node
+        """
+        root = None
+        todo = [(indices, None, False)]
+        while todo:
+            indices, parent, is_right = todo.pop()
+            node, left, right = self._split(indices)
+            if parent is None:
+                root = node
+            elif is_right:
+                parent.right = node
+            else:
+                parent.left = node
+            if left:
+                todo.append((left, node, False))
+            if right:
+                todo.append((right, node, True))
+        return root
+
+    def _split(self, indices: list) -> tuple:
+        """
+        Create the node for a list of intervals, using the median distinct boundary as center
+        :param indices: interval indices
+        :return: node, indices left of the center, indices right of the center
+        """
+        starts, ends = self._starts, self._ends
+        values = set()
+        for i in indices:
+            if starts[i][0] == 0:
+                values.add(starts[i][1])
+            if ends[i][0] == 0:
+                values.add(ends[i][1])
+        center = None
+        here, left, right = indices, [], []
+        if len(values) > 1:
+            center = _point_key(sorted(values)[len(values) // 2])
+            here = []
+            for i in indices:
+                if ends[i] < center:
+                    left.append(i)
+                elif starts[i] > center:
+                    right.append(i)
+                else:
+                    here.append(i)
+            if len(left) == len(indices) or len(right) == len(indices):
+                center, here, left, right = None, indices, [], []
+        by_start = sorted([(starts[i], i) for i in here])
+        by_end = sorted([(ends[i], i) for i in here], reverse=True)
+        return _IntervalNode(center, by_start, by_end), left, right
+
+    def _stab(self, key: tuple, result: list) -> list:
+        """
+        Collect the indices of all intervals containing a key
+        :param key: point key
+        :param result: list to add the indices to
+        :return: result
+        """
+        if self._sorted_starts is None:
+            self._build()
+        starts, ends = self._starts, self._ends
+        node = self._root
+        while node is not None:
+            if node.center is None:
+                for _, i in node.by_start:
+                    if starts[i] <= key <= ends[i]:
+                        result.append(i)
+                node = None
+            elif key < node.center:
+                for start, i in node.by_start:
+                    if start > key:
+                        break
+                    result.append(i)
+                node = node.left
+            elif key > node.center:
+                for end, i in node.by_end:
+                    if end < key:
+                        break
+                    result.append(i)
+                node = node.right
+            else:
+                result.extend([i for _, i in node.by_start])
+                node = None
+        return result
+
+    def containing_indices(self, value) -> list:
+        """
+        Get the indices of the intervals that contain a value
+        :param value: Value to look up
+        :return: list of indices, in no particular order
+        """
+        return self._stab(_point_key(value), [])
+
+    def containing(self, value) -> list:
+        """
+        Get the intervals that contain a value
+        :param value: Value to look up
+        :return: list of intervals, in no particular order
+        """
+        return [self._intervals[i] for i in self.containing_indices(value)]
+
+    def overlapping_indices(self, interval: Interval) -> list:
+        """
+        Get the indices of the intervals that have at least one value in common with an interval
+        :param interval: Interval to compare with
+        :return: list of indices, in no particular order
+        """
+        start, end = _start_key(interval), _end_key(interval)
+        result = self._stab(start, [])  # intervals that already started at the start of the query
+        sorted_starts = self._sorted_starts
+        first = bisect_right(sorted_starts, (start, len(self._intervals)))
+        for i in range(first, len(sorted_starts)):  # intervals that start within the query
+            key, index = sorted_starts[i]
+            if key > end:
+                break
+            result.append(index)
+        return result
+
+    def overlapping(self, interval: Interval) -> list:
+        """
+        Get the intervals that have at least one value in common with an interval
+        :param interval: Interval to compare with
+        :return: list of intervals, in no particular order
+        """
+        return [self._intervals[i] for i in self.overlapping_indices(interval)]
+
+    def classify(self, values, first_only: bool = False) -> list:
+        """
+        Determine for many values at once which intervals contain them.
+        The values are sorted once and swept along the interval boundaries, which costs O((n + m) log(n + m) + k)
+        for n intervals, m values and k matches.
+        :param values: Iterable of values
+        :param first_only: If True, return per value only the lowest index of a containing interval, or -1
+        :return: per value a sorted list of interval indices, or a single index if first_only is set
+        """
+        values = list(values)
+        if self._sorted_starts is None:
+            self._build()
+        starts = self._sorted_starts
+        ends = sorted(zip(self._ends, range(len(self._ends))))
+        order = sorted(range(len(values)), key=lambda j: values[j])
+        ret = [-1 if first_only else []] * len(values)
+        active = set()
+        s = e = 0
+        for j in order:
+            key = _point_key(values[j])
+            while s < len(starts) and starts[s][0] <= key:
+                active.add(starts[s][1])
+                s += 1
+            while e < len(ends) and ends[e][0] < key:
+                active.discard(ends[e][1])
+                e += 1
+            if first_only:
+                ret[j] = min(active) if active else -1
+            else:
+                ret[j] = sorted(active)
+        return ret
+
 
 if __name__ == '__main__':
     raise NotImplementedError(__name__)
@@ -19,6 +19,7 @@
 import copy
 import os
 from typing import Optional
+from data.instrumentation import probe
 from data.vector import Vector
 from formatting.format import List
 
@@ -39,6 +40,25 @@ class TableOutOfBoundsException(TableException):
     pass
 
 
+class MatrixException(Exception):
+    """
+    Matrix specific exceptions
+    """
+
+    pass
+
+
+class MatrixOutOfBoundsException(MatrixException):
+    """
+    Matrix specific exceptions
+    """
+
+    pass
+
+
+ALLOWED_ROW_TYPES = (list, tuple)
+
+
 class Table(List):
     """
     A table is a list of list where every row has the same length and every nth element of a rox has the same time
@@ -434,6 +454,7 @@ class Matrix:
             ret += f"No data {os.linesep}"
         return f"{ret}]"
 
+    @probe("Matrix.json", rows=lambda args, result: len(args[0]))
     def json(self) -> str:
         """
         JSON representation
@@ -620,19 +641,20 @@ class Matrix:
         :param headers: list of header
         """
         if len(self._data) == 0 or len(self._headers) == 0 or len(self._headers) == len(headers):
-            self._headers = strings.list_stringify(headers)
+            self._headers = [str(header) for header in headers]
         else:
             raise MatrixException("Can not set headers: matrix is not empty or new size does not equal old size")
 
+    @probe("Matrix.add_row", rows=lambda args, result: 1)
     def add_row(self, row: list) -> None:
         """
         Add a row to the matrix
         :param row: Row to add
         """
         self.check_row(row, True)  # will throw exception in case of problems
-        if len(self._headers) != len(row):
-            if len(self._headers) == 0:
-                self.set_headers([x for x in range(len(row))])
+        if len(self._headers) == 0:
+            self.set_headers([x for x in range(len(row))])
+        elif len(self._headers) != len(row):
             raise MatrixOutOfBoundsException(f"row width ({len(row)} does not match header width {len(self._headers)}")
         if type(row) == list:
             self._data.append(row)
@@ -812,6 +834,7 @@ class Matrix:
             previous_row = current_row
         self._data = temp_data
 
+    @probe("Matrix.sort", rows=lambda args, result: len(args[0]))
     def sort(self, sort_function=None):
         """
         Sort the matrix
@@ -858,6 +881,7 @@ class Matrix:
         return subtract(self, right)
 
 
+@probe("subtract", rows=lambda args, result: len(args[0]) + len(args[1]))
 def subtract(remove_from: Matrix, to_remove: Matrix) -> Matrix:
     """
 
@@ -909,6 +933,7 @@ def subtract(remove_from: Matrix, to_remove: Matrix) -> Matrix:
     return ret
 
 
+@probe("comm", rows=lambda args, result: len(args[0]) + len(args[1]))
 def comm(orig_left: Matrix, orig_right: Matrix) -> (Matrix, Matrix, Matrix):
     """
     Takes to two Matrices columns and create a map of three Matrices
@@ -16,9 +16,24 @@
 
 """
 
-from datetime import datetime
+from array import array
+from collections import deque
+from asyncio import current_task, get_running_loop
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from functools import wraps
+from heapq import merge
+from threading import Event, Lock, Thread, current_thread, get_ident, main_thread
+from time import perf_counter_ns
 
 import os
+import sys
+import weakref
+
+from data.instrumentation import Statistic
+
+HOTTEST_LIMIT = 3  # number of functions shown per lap
+_MICROSECOND = timedelta(microseconds=1)
 
 
 class StopwatchError(Exception):
@@ -33,7 +48,7 @@ class Lap:
     Lap, like on a stopwatch
     """
 
-    def __init__(self, base: datetime, previous: datetime, start: datetime, name: str = "", pattern: str = "%x %X") -> None:
+    def __init__(self, base: datetime, previous: datetime, start: datetime, name: str = "", pattern: str = "%x %X", samples: dict = None) -> None:
         self.base = base
         self.previous = previous
         self.start = start
@@ -41,6 +56,7 @@ class Lap:
         self.elapsed_since_previous = start - previous
         self.name = name
         self.pattern = pattern
+        self.samples = samples  # stack samples taken during the lap, see SamplingProfiler
 
     def __repr__(self) -> str:
         name_text = '' if self.name is None or len(self.name) == 0 else f"'{self.name}'"
@@ -51,7 +67,10 @@ class Lap:
         Right alignment indent
         :param indent: number of characters
         """
-        return f"LAP '{self.name:{indent}}' clicked at {self.start}, absolute {self.elapsed_since_start}, relative: {self.elapsed_since_previous}"
+        text = f"LAP '{self.name:{indent}}' clicked at {self.start}, absolute {self.elapsed_since_start}, relative: {self.elapsed_since_previous}"
+        if self.samples:
+            text += ", hottest: " + ", ".join([f"{label} {fraction:.0%}" for label, count, fraction in hottest(self.samples, HOTTEST_LIMIT)])
+        return text
 
 
 class Stopwatch:
@@ -65,19 +84,29 @@ class Stopwatch:
 
     # TODO: If START is clicked after STOP then the stopwatch should leave a gap in the laps.
 
-    def __init__(self, align: bool = True, pattern: str = "%x %X") -> None:
+    def __init__(self, align: bool = True, pattern: str = "%x %X", sampler=None, sink=None, max_laps: int = None) -> None:
         """
         Initialize the stopwatch:
         - start time is set to now
         - laps are emptied
         :param align: If True laps: When printing all laps, the names will be right-filled with spaces until all names have the same length. Otherwise, the lap names will be printed as-is
         :param pattern: timestamp format, see datetime.strftime()
+        :param sampler: Optional running SamplingProfiler, every lap keeps the stack samples taken during the lap
+        :param sink: Optional SpanSink (see data.export), every lap is streamed to it as a span on the
+        time.perf_counter_ns() clock, like Profiler spans
+        :param max_laps: If given, only the last max_laps laps are kept in memory
         """
         self.start = self.previous = datetime.now()  # start time, time of the previous click on 'LAP'
+        self.start_ns = perf_counter_ns()  # start on the monotonic clock used for the sink
         self.stop = None  # if a stopwatch has been stopped, no further clicks are allowed
-        self.laps = []
+        self.laps = [] if max_laps is None else deque(maxlen=max_laps)
+        self.max_laps = max_laps
+        self.sink = sink
         self.align = align
         self.pattern = pattern
+        self.sampler = sampler
+        if sampler is not None:
+            sampler.take()
 
     def __repr__(self) -> str:
         width = max([len(lap.name) for lap in self.laps] or [0]) if self.align else 0
@@ -99,7 +128,7 @@ class Stopwatch:
         """
         Reset the stopwatch.
         """
-        self.__init__()
+        self.__init__(sampler=self.sampler, sink=self.sink, max_laps=self.max_laps)
 
     def click_lap(self, name: str = "", exact_time=None) -> None:
         """
@@ -110,9 +139,20 @@ class Stopwatch:
         click_time = datetime.now() if exact_time is None else exact_time
         if self.stop is not None:
             raise StopwatchError("Watch is already stopped. Can not add laps")
-        self.laps.append(Lap(self.start, self.previous, click_time, name, self.pattern))
+        samples = None if self.sampler is None else self.sampler.take()
+        self.laps.append(Lap(self.start, self.previous, click_time, name, self.pattern, samples))
+        if self.sink is not None:
+            self.sink.record(name, self.perf_counter_ns(self.previous), (click_time - self.previous) // _MICROSECOND * 1000, "lap")
         self.previous = click_time
 
+    def perf_counter_ns(self, moment: datetime) -> int:
+        """
+        Convert a moment to the time.perf_counter_ns() clock, relative to the start of the stopwatch
+        :param moment: datetime
+        :return: ns
+        """
+        return self.start_ns + (moment - self.start) // _MICROSECOND * 1000
+
     def click_stop(self, name: str = ""):
         """
         Click on the STOP button
@@ -129,5 +169,425 @@ class Stopwatch:
         return f"""{"<BR/>".join(self.lap_texts())}"""
 
 
+def _running_task():
+    """
+    Get the running asyncio task
+    :return: Task, or None outside of a running event loop
+    """
+    try:
+        get_running_loop()
+    except RuntimeError:
+        return None
+    return current_task()
+
+
+class Timeline:
+    """
+    Laps clicked by one thread or one asyncio task. Only the owner appends, so no locking is needed.
+    The task is held by a weak reference, so finished tasks are not kept alive by the stopwatch.
+    """
+
+    __slots__ = ("thread", "task", "label", "names", "clicks")
+
+    def __init__(self, task, label: str) -> None:
+        """
+        :param task: owning asyncio task, None if the timeline belongs to the current thread
+        :param label: name shown in the report
+        """
+        self.thread = get_ident()
+        self.task = None if task is None else weakref.ref(task)
+        self.label = label
+        self.names = []
+        self.clicks = array('q')  # perf_counter_ns() per lap
+
+    def owned_by(self, task) -> bool:
+        """
+        :param task: running asyncio task or None
+        :return: True if the timeline belongs to the task, or to the current thread if task is None
+        """
+        if task is None:
+            return self.task is None and self.thread == get_ident()
+        return self.task is not None and self.task() is task
+
+
+class ConcurrentStopwatch:
+    """
+    Stopwatch that can be clicked concurrently from several threads and asyncio tasks.
+    Every thread or task gets its own timeline, found through a context variable, so clicking a lap is a plain append.
+    The timelines are only merged when the stopwatch is reported.
+    """
+
+    def __init__(self, align: bool = True, sink=None) -> None:
+        """
+        :param align: If True, lap names are right-filled with spaces until all names have the same length
+        :param sink: Optional SpanSink (see data.export), every lap is streamed to it as a span
+        """
+        self.start = perf_counter_ns()
+        self.started_at = datetime.now()
+        self.stop = None
+        self.align = align
+        self.sink = sink
+        self.timelines = []  # list.append is atomic, timelines are only added
+        self._current = ContextVar(f"stopwatch-{id(self)}", default=None)
+
+    def __repr__(self) -> str:
+        return os.linesep.join(self.lap_texts())
+
+    def timeline(self) -> Timeline:
+        """
+        Get the timeline of the current thread or task, create it if needed
+        :return: Timeline
+        """
+        task = _running_task()
+        timeline = self._current.get()
+        if timeline is None or not timeline.owned_by(task):  # a new task inherits the context of its creator
+            label = current_thread().name if task is None else f"{current_thread().name}/{task.get_name()}"
+            timeline = Timeline(task, label)
+            self.timelines.append(timeline)
+            self._current.set(timeline)
+        return timeline
+
+    def click_lap(self, name: str = "") -> None:
+        """
+        Click on the LAP button of the current thread or task
+        :param name: Name of the lap
+        """
+        click = perf_counter_ns()
+        if self.stop is not None:
+            raise StopwatchError("Watch is already stopped. Can not add laps")
+        timeline = self.timeline()
+        if self.sink is not None:
+            previous = timeline.clicks[-1] if len(timeline.clicks) else self.start
+            self.sink.record(name, previous, click - previous, "lap")
+        timeline.names.append(name)
+        timeline.clicks.append(click)
+
+    def click_stop(self, name: str = "") -> None:
+        """
+        Click on the STOP button, this adds a last lap to the current thread or task
+        """
+        self.click_lap(name)
+        self.stop = perf_counter_ns()
+
+    def laps(self) -> list:
+        """
+        Merge the laps of all timelines in order of time
+        :return: list of (ns since start, ns since the previous lap of the same timeline, timeline label, lap name)
+        """
+        def _laps(timeline: Timeline):
+            previous = self.start
+            for i in range(len(timeline.clicks)):
+                click = timeline.clicks[i]
+                yield click - self.start, click - previous, timeline.label, timeline.names[i]
+                previous = click
+
+        return list(merge(*[_laps(timeline) for timeline in list(self.timelines)]))
+
+    def lap_texts(self) -> list:
+        """
+        Create list of lap descriptions, times in milliseconds
+        """
+        laps = self.laps()
+        label_width = max([len(lap[2]) for lap in laps] or [0]) if self.align else 0
+        name_width = max([len(lap[3]) for lap in laps] or [0]) if self.align else 0
+        ret = [f"Stopwatch started at: {self.started_at}"]
+        for absolute, relative, label, name in laps:
+            ret.append(f"[{label:{label_width}}] LAP '{name:{name_width}}' absolute {absolute / 1e6:.3f} ms, relative: {relative / 1e6:.3f} ms")
+        if self.stop is not None:
+            ret.append(f"stopped after {(self.stop - self.start) / 1e6:.3f} ms")
+        return ret
+
+    def html(self) -> str:
+        """
+        HTML representation of the stopwatch
+        """
+        return "<BR/>".join(self.lap_texts())
+
+
+def _code_label(code) -> str:
+    """
+    Readable name of a code object
+    :param code: code object
+    :return: function (file:line)
+    """
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def hottest(samples: dict, limit: int = HOTTEST_LIMIT) -> list:
+    """
+    Determine the functions that were most often on top of the stack
+    :param samples: dict stack (code objects, innermost first) -> number of samples
+    :param limit: maximum number of functions
+    :return: list of (function label, number of samples, fraction of all samples), most frequent first
+    """
+    counts = dict()
+    for stack, count in samples.items():
+        counts[stack[0]] = counts.get(stack[0], 0) + count
+    total = sum(counts.values())
+    ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [(_code_label(code), count, count / total) for code, count in ranked]
+
+
+def folded(samples: dict) -> str:
+    """
+    Convert stack samples to the folded format of flame graph tools: one line per stack, outermost function first
+    :param samples: dict stack (code objects, innermost first) -> number of samples
+    :return: text with lines 'outer;...;inner count'
+    """
+    return os.linesep.join([f"{';'.join([_code_label(code) for code in reversed(stack)])} {count}" for stack, count in samples.items()])
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler: a background thread samples the call stack of one thread at a fixed rate.
+    Samples are counted per distinct stack of code objects; labels are only created when reporting.
+    Usage:
+        with SamplingProfiler(rate=100) as sampler:
+            stopwatch = Stopwatch(sampler=sampler)
+            ...
+            stopwatch.click_lap("step")  # the lap keeps the samples taken since the previous lap
+        print(folded(sampler.samples))
+    """
+
+    def __init__(self, rate: float = 100, thread_id: int = None) -> None:
+        """
+        :param rate: samples per second
+        :param thread_id: ident of the thread to sample, default the main thread
+        """
+        if rate <= 0:
+            raise StopwatchError("rate must be strictly positive")
+        self.interval = 1 / rate
+        self.thread_id = main_thread().ident if thread_id is None else thread_id
+        self.samples = dict()  # stack -> count, since start
+        self._window = dict()  # stack -> count, since the last take()
+        self._lock = Lock()
+        self._stopping = Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """
+        Start sampling in a daemon thread
+        """
+        if self._thread is not None:
+            raise StopwatchError("Sampler is already running")
+        self._stopping.clear()
+        self._thread = Thread(target=self._run, name="SamplingProfiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop sampling, the collected samples are kept
+        """
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        """
+        Take one sample of the stack of the sampled thread
+        """
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        stack = tuple(stack)
+        with self._lock:
+            self.samples[stack] = self.samples.get(stack, 0) + 1
+            self._window[stack] = self._window.get(stack, 0) + 1
+
+    def take(self) -> dict:
+        """
+        Get the samples taken since the previous call and start a new window
+        :return: dict stack (code objects, innermost first) -> number of samples
+        """
+        with self._lock:
+            ret, self._window = self._window, dict()
+        return ret
+
+    def hottest(self, limit: int = HOTTEST_LIMIT) -> list:
+        """
+        See hottest(), for all samples since start
+        """
+        with self._lock:
+            return hottest(dict(self.samples), limit)
+
+    def folded(self) -> str:
+        """
+        See folded(), for all samples since start
+        """
+        with self._lock:
+            return folded(dict(self.samples))
+
+
+class SpanNode(Statistic):
+    """
+    Node in the tree of profiled spans. It aggregates the durations (ns) of all spans with the same path.
+    """
+
+    __slots__ = ("name", "parent", "children")
+
+    def __init__(self, name: str, parent=None) -> None:
+        super().__init__()
+        self.name = name
+        self.parent = parent
+        self.children = dict()  # name -> SpanNode
+
+    def path(self) -> tuple:
+        """
+        Get the names from the root to this node, the root itself excluded
+        :return: tuple of names
+        """
+        ret = []
+        node = self
+        while node.parent is not None:
+            ret.append(node.name)
+            node = node.parent
+        return tuple(reversed(ret))
+
+    def walk(self, depth: int = 0):
+        """
+        Iterate over this node and all nodes below, depth first
+        :param depth: depth of this node
+        :return: generator of (depth, node)
+        """
+        yield depth, self
+        for child in self.children.values():
+            yield from child.walk(depth + 1)
+
+
+class Span:
+    """
+    Named span of a profiler, to be used as context manager or as decorator.
+    Span objects are reused, the start times of open spans are kept on the stack of the profiler.
+    """
+
+    __slots__ = ("profiler", "name", "starts")
+
+    def __init__(self, profiler, name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.starts = profiler.starts
+
+    def __enter__(self):
+        profiler = self.profiler
+        node = profiler.current
+        child = node.children.get(self.name)
+        if child is None:
+            child = node.children[self.name] = SpanNode(self.name, node)
+        profiler.current = child
+        self.starts.append(perf_counter_ns())
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        start = self.starts.pop()
+        elapsed = perf_counter_ns() - start
+        profiler = self.profiler
+        node = profiler.current
+        profiler.current = node.parent
+        node.add(elapsed)
+        if profiler.sink is not None:
+            profiler.sink.record(self.name, start, elapsed, "span")
+
+    def __call__(self, func):
+        @wraps(func)
+        def inner(*args, **kwargs):
+            with self:
+                return func(*args, **kwargs)
+
+        return inner
+
+
+class Profiler:
+    """
+    Low overhead, hierarchical alternative for the stopwatch, based on the monotonic time.perf_counter_ns().
+    Spans can be nested; durations are aggregated per path (count, total, min, max) instead of being stored, so memory
+    does not grow with the number of spans.
+    Usage:
+        profiler = Profiler()
+        with profiler.span("load"):
+            with profiler.span("parse"):
+                ...
+
+        @profiler.span("step")
+        def step(): ...
+    """
+
+    def __init__(self, sink=None) -> None:
+        """
+        :param sink: Optional SpanSink (see data.export), every span is streamed to it
+        """
+        self.sink = sink
+        self.root = SpanNode("")
+        self.current = self.root
+        self.starts = []
+        self._spans = dict()
+
+    def __repr__(self) -> str:
+        return os.linesep.join(self.report_texts())
+
+    def span(self, name: str) -> Span:
+        """
+        Get the span with a name
+        :param name: Name of the span
+        :return: Span, usable as context manager or decorator
+        """
+        ret = self._spans.get(name)
+        if ret is None:
+            ret = self._spans[name] = Span(self, name)
+        return ret
+
+    def reset(self) -> None:
+        """
+        Remove all collected statistics. Must not be called while spans are open.
+        """
+        if self.starts:
+            raise StopwatchError("Can not reset while spans are open")
+        self.root = self.current = SpanNode("")
+
+    def buckets(self) -> dict:
+        """
+        Get the statistics per span
+        :return: dict path (tuple of names) -> Bucket with the durations in ns
+        """
+        return {node.path(): node.bucket() for depth, node in self.root.walk() if depth > 0}
+
+    def report_texts(self) -> list:
+        """
+        Create a list of span descriptions, indented by nesting level. Times are in milliseconds
+        """
+        ret = []
+        for depth, node in self.root.walk():
+            if depth == 0:
+                continue
+            bucket = node.bucket()
+            if bucket.count() == 0:
+                ret.append(f"{'  ' * (depth - 1)}{node.name}: open")
+                continue
+            ret.append(f"{'  ' * (depth - 1)}{node.name}: count {bucket.count()}, total {bucket.total / 1e6:.3f} ms, "
+                       f"avg {bucket.avg() / 1e6:.6f} ms, min {bucket.min() / 1e6:.6f} ms, max {bucket.max() / 1e6:.6f} ms")
+        return ret
+
+    def html(self) -> str:
+        """
+        HTML representation of the profiler
+        """
+        return "<BR/>".join(self.report_texts())
+
+
 if __name__ == "__main__":
     raise NotImplementedError(__file__)
@@ -15,12 +15,160 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 """
-from ctypes import Union
+import os
+import time
+from array import array
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import reduce
+from itertools import islice, repeat
+from operator import is_, is_not
+from typing import Union
+
+from data.bucketlist import Bucket
+from data.cache import memoize
+from data.matrix import Matrix
+
+CHUNK_SIZE = 1000  # default number of elements per parallel task
+MATCHER_CACHE_SIZE = 32  # compiled PrefixMatchers kept by starts_with_from_list
+EXECUTORS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+TYPED_BUFFERS = (array, memoryview, bytes, bytearray)  # sequences that can't hold None
+
+
+class ToolsException(Exception):
+    """
+    General tools exception
+    """
+    pass
+
+
+class ChunkException(ToolsException):
+    """
+    A chunk failed in parallel_map or parallel_reduce
+    """
+
+    def __init__(self, index: int, start: int, error: BaseException) -> None:
+        """
+        :param index: number of the failing chunk
+        :param start: position of the first element of the chunk in the input
+        :param error: exception raised by the chunk
+        """
+        super().__init__(f"Chunk {index} (elements from {start}) failed: {error!r}")
+        self.index = index
+        self.start = start
+        self.error = error
+
+    def __reduce__(self):
+        return ChunkException, (self.index, self.start, self.error)
+
+
+def error_invalid_param_type(name: str, value) -> str:
+    """
+    Message for a parameter with an invalid value
+    :param name: name of the parameter
+    :param value: value of the parameter
+    :return: message
+    """
+    return f"Invalid value for parameter {name}: {value} ({type(value)})"
+
+
+class PrefixMatcher:
+    """
+    Prefix list compiled into a trie, to match many strings against many prefixes.
+    A lookup walks the string once, so it takes O(len(string)) whatever the number of prefixes. Case insensitive
+    matching compares str.upper() versions, like starts_with_from_list always did; the prefixes are folded once when
+    the matcher is built.
+    """
+
+    _END = ""  # trie key of the prefix ending at a node, never a character
+
+    def __init__(self, prefixes, case_sensitive: bool = True) -> None:
+        """
+        :param prefixes: iterable of str prefixes
+        :param case_sensitive: case modus
+        """
+        self.case_sensitive = case_sensitive
+        self._root = dict()
+        self._count = 0
+        for prefix in prefixes:
+            if not isinstance(prefix, str):
+                raise ToolsException(error_invalid_param_type("prefix", prefix))
+            node = self._root
+            for character in self._fold(prefix):
+                node = node.setdefault(character, dict())
+            if self._END not in node:
+                node[self._END] = prefix
+                self._count += 1
+        if self._count == 0:
+            raise ToolsException(error_invalid_param_type("prefixes", prefixes))
+
+    def __repr__(self) -> str:
+        return f"PrefixMatcher({self._count} prefixes, case_sensitive={self.case_sensitive})"
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _fold(self, string: str) -> str:
+        """
+        :param string: str
+        :return: string, upper cased if not case sensitive
+        """
+        if string is None:
+            raise ToolsException(error_invalid_param_type("string", string))
+        return string if self.case_sensitive else string.upper()
+
+    def match(self, string: str) -> bool:
+        """
+        :param string: value to check
+        :return: true if the string starts with any of the prefixes
+        """
+        end = self._END
+        node = self._root
+        for character in self._fold(string):
+            if end in node:
+                return True
+            node = node.get(character)
+            if node is None:
+                return False
+        return end in node
+
+    def longest_match(self, string: str):
+        """
+        :param string: value to check
+        :return: the longest prefix the string starts with (as given, not folded), None if there is none
+        """
+        end = self._END
+        node = self._root
+        ret = node.get(end)
+        for character in self._fold(string):
+            node = node.get(character)
+            if node is None:
+                break
+            ret = node.get(end, ret)
+        return ret
+
+    def match_many(self, strings) -> list:
+        """
+        :param strings: iterable of values to check
+        :return: list with match() of every string
+        """
+        match = self.match
+        return [match(string) for string in strings]
+
+
+@memoize(max_size=MATCHER_CACHE_SIZE, thread_safe=True)
+def _compiled_matcher(prefixes: tuple, case_sensitive: bool) -> PrefixMatcher:
+    """
+    PrefixMatcher for starts_with_from_list, cached for repeated prefix lists
+    """
+    return PrefixMatcher(prefixes, case_sensitive)
 
 
 def starts_with_from_list(string: str, prefixes: list, case_sensitive: bool = True) -> bool:
     """
     Check if a string starts with any
+    Uses a cached PrefixMatcher. The cache is keyed on tuple(prefixes), so every call still costs O(len(prefixes)) to
+    build and hash that key; with a large prefix list, build a PrefixMatcher once and call its match() instead.
     :param string: value to check
     :param prefixes: list of strings
     :param case_sensitive: case modus
@@ -30,14 +178,7 @@ def starts_with_from_list(string: str, prefixes: list, case_sensitive: bool = Tr
         raise Warning(error_invalid_param_type('string', string))
     if none_or_empty(prefixes):
         raise Warning(error_invalid_param_type('string', string))
-    for prefix in prefixes:
-        if case_sensitive:
-            if string.startswith(prefix):
-                return True
-        else:
-            if string.upper().startswith(prefix.upper()):
-                return True
-    return False
+    return _compiled_matcher(tuple(prefixes), case_sensitive).match(string)
 
 
 def get_epoch_now() -> int:
@@ -83,7 +224,7 @@ def get_first_non_none(*args) -> object:
     for value in args:
         if value is not None:
             return value
-    raise exceptions.FrameworkException("No not none value found in list {*args}")
+    raise ToolsException(f"No not none value found in {args}")
 
 
 def none_or_empty(value) -> bool:
@@ -108,29 +249,368 @@ def not_none_or_empty(value) -> bool:
     return not none_or_empty(value)
 
 
+def none_mask(values) -> bytearray:
+    """
+    Column version of value is None
+    :param values: sequence or typed buffer
+    :return: bytearray with 1 for every None and 0 otherwise
+    """
+    if isinstance(values, TYPED_BUFFERS):
+        return bytearray(len(values))
+    return bytearray(map(is_, values, repeat(None)))
+
+
+def none_or_empty_mask(values) -> bytearray:
+    """
+    Column version of none_or_empty
+    :param values: sequence or typed buffer
+    :return: bytearray with 1 for every value that is None or empty and 0 otherwise
+    """
+    if isinstance(values, TYPED_BUFFERS):
+        return bytearray(len(values))
+    return bytearray(map(none_or_empty, values))
+
+
+def count_nones_in(values) -> int:
+    """
+    Column version of count_nones
+    :param values: iterable or typed buffer
+    :return: Number of Nones
+    """
+    if isinstance(values, TYPED_BUFFERS):
+        return 0
+    return sum(map(is_, values, repeat(None)))
+
+
+def count_not_nones_in(values) -> int:
+    """
+    Column version of count_not_nones
+    :param values: iterable or typed buffer
+    :return: Number of non None values
+    """
+    if isinstance(values, TYPED_BUFFERS):
+        return len(values)
+    return sum(map(is_not, values, repeat(None)))
+
+
+def matrix_none_counts(matrix) -> list:
+    """
+    Count the Nones of every column of a matrix in one pass over its rows
+    :param matrix: Matrix or list of rows
+    :return: list with the number of Nones per column
+    """
+    columns = list(zip(*matrix))
+    if not columns:
+        return [0] * (matrix.width() if isinstance(matrix, Matrix) and matrix.check_headers() else 0)
+    return [count_nones_in(column) for column in columns]
+
+
+def coalesce(*columns, raise_if_none: bool = False) -> list:
+    """
+    Column version of get_first_non_none and find_non_none: per row the first non None value across the columns
+    Each column is passed once, and later columns are skipped as soon as no None is left.
+    :param columns: sequences or typed buffers of the same length, e.g. Matrix.column()
+    :param raise_if_none: If true, a ToolsException is raised for a row without a non None value (like
+    get_first_non_none), otherwise that row gets None (like find_non_none)
+    :return: list of values
+    """
+    if not columns:
+        return []
+    length = len(columns[0])
+    for column in columns:
+        if len(column) != length:
+            raise ToolsException(f"Columns differ in length: {length} != {len(column)}")
+    ret = list(columns[0])
+    for column in columns[1:]:
+        if not any(map(is_, ret, repeat(None))):  # identity, a cell's __eq__ is never called
+            break
+        ret = [value if value is not None else other for value, other in zip(ret, column)]
+    if raise_if_none:
+        for index, value in enumerate(ret):
+            if value is None:
+                raise ToolsException(f"No not none value found in row {index}")
+    return ret
+
+
+def coalesce_columns(matrix, *indices, raise_if_none: bool = False) -> list:
+    """
+    coalesce() of columns of a Matrix
+    :param matrix: Matrix
+    :param indices: column indices, in order of preference
+    :param raise_if_none: If true, a ToolsException is raised for a row without a non None value
+    :return: list of values
+    """
+    return coalesce(*(matrix.column(index) for index in indices), raise_if_none=raise_if_none)
+
+
+def _check_chunk_size(size: int, step: int) -> int:
+    """
+    Validate the size and stride of chunks
+    :param size: chunk size
+    :param step: stride between chunk starts, None for size
+    :return: step
+    """
+    if size < 1:
+        raise ToolsException(f"Size {size} must be strictly positive")
+    if step is None:
+        return size
+    if step < 1:
+        raise ToolsException(f"Step {step} must be strictly positive")
+    return step
+
+
+def _pad_chunk(chunk, missing: int, fill_value):
+    """
+    Complete the last chunk with fill values
+    :param chunk: memoryview, str, list, tuple or other sequence slice
+    :param missing: number of fill values to add
+    :param fill_value: value to add
+    :return: padded copy of chunk, an array for memoryviews and a list for other sequences
+    """
+    if isinstance(chunk, memoryview):
+        return array(chunk.format, chunk.tolist() + [fill_value] * missing)
+    if isinstance(chunk, str):
+        return chunk + fill_value * missing
+    if isinstance(chunk, (list, tuple)):
+        return chunk + type(chunk)([fill_value] * missing)
+    return list(chunk) + [fill_value] * missing
+
+
+def _check_fill_value(view, fill_value) -> None:
+    """
+    Check that fill_value can pad chunks of view
+    :param view: memoryview of a buffer, or another sequence
+    :param fill_value: value to pad with
+    :raise ToolsException: if fill_value does not fit the buffer type, or is not a str for a str
+    """
+    if isinstance(view, memoryview):
+        try:
+            array(view.format, [fill_value])
+        except (TypeError, ValueError, OverflowError) as error:
+            raise ToolsException(f"fill_value {fill_value!r} can not pad a buffer of format '{view.format}', "
+                                 f"give a matching fill_value") from error
+    elif isinstance(view, str) and not isinstance(fill_value, str):
+        raise ToolsException(f"fill_value {fill_value!r} can not pad a str, give a str fill_value")
+
+
+def chunks(sequence, size: int, step: int = None, pad: bool = False, fill_value=None):
+    """
+    Lazily split a sequence in chunks of a specific size.
+    Objects supporting the buffer protocol (bytes, bytearray, array, mmap, memoryview) give memoryviews on the
+    original data, without copying. Other sequences (list, tuple, str, range) give slices, so only one chunk at a time is
+    copied. Chunks start every step elements; a step smaller than size gives overlapping windows, a larger step skips
+    elements. The last chunk is the first one reaching the end of the sequence and may be shorter than size.
+    :param sequence: sequence to split
+    :param size: size of the chunks
+    :param step: stride between the starts of the chunks, default size
+    :param pad: If true, the last chunk is completed with fill_value. A padded buffer chunk is an array copy
+    :param fill_value: Use this value in case pad is true, otherwise ignore this parameter. It must fit the type of a
+    buffer (e.g. an int for bytes) or be a str for a str, otherwise ToolsException is raised
+    :return: generator of chunks
+    """
+    step = _check_chunk_size(size, step)
+    if sequence is None:
+        return
+    try:
+        view = memoryview(sequence)
+    except TypeError:
+        view = sequence
+    if pad:
+        _check_fill_value(view, fill_value)
+    length = len(view)
+    start = 0
+    while start < length:
+        end = start + size
+        chunk = view[start:end]
+        if end > length and pad:
+            chunk = _pad_chunk(chunk, end - length, fill_value)
+        yield chunk
+        if end >= length:
+            return
+        start += step
+
+
+def iter_chunks(iterable, size: int, step: int = None, pad: bool = False, fill_value=None):
+    """
+    Lazily split any iterable (generators, files, ...) in tuples of a specific size, reading it with itertools.islice.
+    Same windows as chunks(): a step smaller than size overlaps, a larger step skips elements, the last chunk may be
+    shorter than size.
+    :param iterable: iterable to split
+    :param size: size of the chunks
+    :param step: stride between the starts of the chunks, default size
+    :param pad: If true, the last chunk is completed with fill_value
+    :param fill_value: Use this value in case pad is true, otherwise ignore this parameter
+    :return: generator of tuples
+    """
+    step = _check_chunk_size(size, step)
+    if iterable is None:
+        return
+    iterator = iter(iterable)
+    window = tuple(islice(iterator, size))
+    while window:
+        if len(window) < size:
+            yield window + (fill_value,) * (size - len(window)) if pad else window
+            return
+        yield window
+        if step < size:
+            fresh = tuple(islice(iterator, step))
+            if not fresh:
+                return
+            window = window[step:] + fresh
+        else:
+            window = tuple(islice(iterator, step - size, step))
+
+
 def split_list(input_list: list, size: int, complete_last: bool = False, default_value=None) -> list:
     """
-    Split a list in parts of a specific size.
+    Split a list in parts of a specific size. Use chunks() or iter_chunks() to get the parts one at a time
     :param input_list: list to split
     :param size: size of the sub lists
     :param complete_last: If true, default values will be added to the last part in order to match the size
     :param default_value: Use this value in case complete_last is true, otherwise ignore this parameter
     """
     if size < 1:
-        raise exceptions.FrameworkException(f"Size {size} must be strictly positive")
-    ret = []
-    if none_or_empty(list):
-        return ret
-    for i in range(math.ceil(len(input_list) / size)):
-        start = i * size
-        end = (i + 1) * size
-        ret.append(input_list[start:end])
-    if complete_last:
-        length = len(ret[-1])
-        if length < size:
-            for i in range(size - length):
-                ret[-1].append(default_value)
-    return ret
+        raise ToolsException(f"Size {size} must be strictly positive")
+    if none_or_empty(input_list):
+        return []
+    return list(chunks(input_list, size, pad=complete_last, fill_value=default_value))
+
+
+def _map_chunk(func, chunk: tuple) -> list:
+    """
+    Task of parallel_map, module level so it can be pickled for a process pool
+    """
+    return [func(value) for value in chunk]
+
+
+def _reduce_chunk(func, reducer, chunk: tuple):
+    """
+    Task of parallel_reduce, module level so it can be pickled for a process pool
+    """
+    return reduce(reducer, map(func, chunk))
+
+
+def _run_chunks(task, args: tuple, iterable, chunk_size: int, executor, workers: int, in_flight: int, ordered: bool):
+    """
+    Submit task(*args, chunk) for every chunk of iterable, keeping at most in_flight chunks submitted
+    :return: generator of task results, in chunk order if ordered, otherwise in order of completion
+    """
+    if isinstance(executor, Executor):
+        pool, owned = executor, False
+    elif executor in EXECUTORS:
+        pool, owned = EXECUTORS[executor](max_workers=workers), True
+    else:
+        raise ToolsException(error_invalid_param_type("executor", executor))
+    if in_flight is None:
+        in_flight = 2 * (workers or os.cpu_count() or 1)
+    if in_flight < 1:
+        raise ToolsException(f"in_flight {in_flight} must be strictly positive")
+    pending = deque() if ordered else dict()  # ordered: deque of (index, future), else future -> index
+
+    def result(index: int, future):
+        try:
+            return future.result()
+        except Exception as error:
+            raise ChunkException(index, index * chunk_size, error) from error
+
+    try:
+        for index, chunk in enumerate(iter_chunks(iterable, chunk_size)):
+            future = pool.submit(task, *args, chunk)
+            if ordered:
+                pending.append((index, future))
+                if len(pending) >= in_flight:
+                    yield result(*pending.popleft())
+            else:
+                pending[future] = index
+                if len(pending) >= in_flight:
+                    for future in wait(pending, return_when=FIRST_COMPLETED).done:
+                        yield result(pending.pop(future), future)
+        if ordered:
+            while pending:
+                yield result(*pending.popleft())
+        else:
+            while pending:
+                for future in wait(pending, return_when=FIRST_COMPLETED).done:
+                    yield result(pending.pop(future), future)
+    finally:
+        for future in (future for _, future in pending) if ordered else pending:
+            future.cancel()
+        if owned:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def merge_into(target, values):
+    """
+    Merge values into a Matrix (values are rows), a Bucket (values are numbers or Buckets) or anything with an append
+    :param target: Matrix, Bucket or list
+    :param values: iterable of values
+    :return: target
+    """
+    if isinstance(target, Matrix):
+        for row in values:
+            target.add_row(row)
+    elif isinstance(target, Bucket):
+        for value in values:
+            if isinstance(value, Bucket):
+                target.merge(value)
+            else:
+                target.append(value)
+    else:
+        for value in values:
+            target.append(value)
+    return target
+
+
+def parallel_map(func, iterable, chunk_size: int = CHUNK_SIZE, executor="thread", workers: int = None,
+                 in_flight: int = None, ordered: bool = True, into=None):
+    """
+    Apply func to every element of iterable in a thread or process pool.
+    The iterable is read lazily in chunks of chunk_size elements, one task per chunk, and at most in_flight chunks are
+    submitted at a time, so memory stays bounded for large inputs. A failing chunk raises a ChunkException with its
+    number and position; the chunks still pending are cancelled.
+    :param func: function of one element, picklable for a process pool
+    :param iterable: elements
+    :param chunk_size: number of elements per task
+    :param executor: "thread", "process" or an Executor, which is not shut down afterwards
+    :param workers: number of workers of a pool created here
+    :param in_flight: maximum number of submitted chunks, default twice the number of workers
+    :param ordered: If true, the results are in the order of the input, otherwise chunks come back as they complete
+    :param into: Matrix, Bucket or list to merge the results into
+    :return: generator of results, or into when given
+    """
+    results = (value for values in _run_chunks(_map_chunk, (func,), iterable, chunk_size, executor, workers,
+                                               in_flight, ordered)
+               for value in values)
+    if into is not None:
+        return merge_into(into, results)
+    return results
+
+
+def parallel_reduce(func, iterable, reducer, initial=None, chunk_size: int = CHUNK_SIZE, executor="thread",
+                    workers: int = None, in_flight: int = None, ordered: bool = True):
+    """
+    Map func over iterable and combine the results with reducer, like reduce(reducer, map(func, iterable), initial).
+    Every chunk is reduced by its worker, the partial results are reduced in the calling thread. reducer must be
+    associative, and also commutative if not ordered.
+    To merge into a Matrix or Bucket, let func return Buckets and use Bucket.merge as reducer, or use parallel_map with
+    into
+    :param func: function of one element, picklable for a process pool
+    :param iterable: elements
+    :param reducer: function(accumulated, value) -> accumulated
+    :param initial: start value, None to start with the first result
+    :param chunk_size: number of elements per task
+    :param executor: "thread", "process" or an Executor, which is not shut down afterwards
+    :param workers: number of workers of a pool created here
+    :param in_flight: maximum number of submitted chunks, default twice the number of workers
+    :param ordered: If true, partial results are combined in input order, otherwise as they complete
+    :return: reduced value, initial if iterable is empty
+    """
+    partials = _run_chunks(_reduce_chunk, (func, reducer), iterable, chunk_size, executor, workers, in_flight,
+                           ordered)
+    accumulated = initial
+    for partial in partials:
+        accumulated = partial if accumulated is None else reducer(accumulated, partial)
+    return accumulated
 
 
 def add_to(target: Union[list, set], value) -> None:
@@ -154,5 +634,5 @@ def find_non_none(_object):
     return None  # this statement can be removed
 
 
-if __name__ == "__name__":
-    raise NotImplementedError()
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
@@ -26,7 +26,8 @@ class Vector(list):
     """
 
     def __init__(self, *args, **kwargs) -> None:
-        list.__init__(self, *args, **kwargs)
+        self._squared_norm = None  # cached sum of squares, reset on every mutation
+        list.__init__(self)
         if len(kwargs) == 0:
             if len(args) == 0:  # no parameter delivered
                 return
@@ -68,16 +69,34 @@ class Vector(list):
 
     def __setitem__(self, key, value):
         self.check_type(value)
+        self._squared_norm = None
         super().__setitem__(key, value)
 
+    def __delitem__(self, key):
+        self._squared_norm = None
+        super().__delitem__(key)
+
+    def __iadd__(self, other):
+        values = list(other)  # other may be an iterator, check and add the same values
+        for value in values:
+            self.check_type(value)
+        self._squared_norm = None
+        return super().__iadd__(values)
+
+    def __imul__(self, other):
+        self._squared_norm = None
+        return super().__imul__(other)
+
     def __cmp__(self, other):
-        return self.distance().__cmp__(other.distance())
+        left = self.squared_norm()
+        right = other.squared_norm()
+        return (left > right) - (left < right)
 
     def __lt__(self, other):
-        return self.distance() < other.distance()
+        return self.squared_norm() < other.squared_norm()
 
     def __le__(self, other):
-        return self.distance() <= other.distance()
+        return self.squared_norm() <= other.squared_norm()
 
     def __eq__(self, other):
         if self is None or other is None or len(self) != len(other):
@@ -91,10 +110,27 @@ class Vector(list):
         return not self.__eq__(other)
 
     def __gt__(self, other):
-        return self.distance() > other.distance()
+        return self.squared_norm() > other.squared_norm()
 
     def __ge__(self, other):
-        return self.distance() >= other.distance()
+        return self.squared_norm() >= other.squared_norm()
+
+    def squared_norm(self) -> Union[float, int]:
+        """
+        Get the sum of the squared values, i.e. the squared distance to the origin.
+        The result is cached until the vector is modified.
+        :return: Squared distance to the origin
+        """
+        if self._squared_norm is None:
+            self._squared_norm = sum([value * value for value in self])
+        return self._squared_norm
+
+    def norm(self) -> float:
+        """
+        Get the Cartesian distance to the origin
+        :return: Distance to the origin
+        """
+        return math.sqrt(self.squared_norm())
 
     def distance(self, other=None) -> float:
         """
@@ -103,7 +139,9 @@ class Vector(list):
         :return: Mathematical Distance
         """
         if other is None:
-            other = Vector(width=len(self))
+            if len(self) == 0:
+                raise IndexError("vectors can not be empty and must be equal size")
+            return self.norm()
         if not isinstance(other, Vector):
             raise TypeError("argument must be a vector")
         elif len(self) == 0 or len(other) == 0 or len(self) != len(other):
@@ -205,8 +243,51 @@ class Vector(list):
         :param value: Value to append
         """
         self.check_type(value)
+        self._squared_norm = None
         super().append(value)
 
+    def extend(self, values) -> None:
+        """
+        Append all values to the vector
+        :param values: Iterable of values to append
+        """
+        for value in values:
+            self.append(value)
+
+    def insert(self, index: int, value) -> None:
+        """
+        Insert the value before index
+        :param index: 0-based index
+        :param value: Value to insert
+        """
+        self.check_type(value)
+        self._squared_norm = None
+        super().insert(index, value)
+
+    def pop(self, index: int = -1):
+        """
+        Remove and return the value at index
+        :param index: 0-based index, default the last value
+        :return: the removed value
+        """
+        self._squared_norm = None
+        return super().pop(index)
+
+    def remove(self, value) -> None:
+        """
+        Remove the first occurrence of value
+        :param value: Value to remove
+        """
+        self._squared_norm = None
+        super().remove(value)
+
+    def clear(self) -> None:
+        """
+        Remove all values from the vector
+        """
+        self._squared_norm = None
+        super().clear()
+
     def abs(self):
         """
         Return a vector with  absolute values of the original
@@ -236,5 +317,16 @@ class Vector(list):
         self.insert(0, temp)
 
 
+def sort_by_norm(vectors, reverse: bool = False) -> list:
+    """
+    Sort vectors by their distance to the origin.
+    Every squared norm is computed at most once, no square roots are taken.
+    :param vectors: Iterable of vectors
+    :param reverse: If True, the longest vector comes first
+    :return: New sorted list of vectors
+    """
+    return sorted(vectors, key=Vector.squared_norm, reverse=reverse)
+
+
 if __name__ == '__main__':
     raise NotImplementedError(__file__)
@@ -0,0 +1,116 @@
+"""
+    This file is part of tolyn.
+
+    tolyn is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+"""
+Benchmark suite of tolyn itself.
+Run from the root of the repository:
+    python -m demo.benchmark --output new.json --compare old.json
+The exit code is 1 if a benchmark regressed compared to the baseline.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+from data.bucketlist import Bucket
+from data.matrix import Matrix, comm, subtract
+from data.vector import Vector
+from graph import Trace
+from testing.benchmark import Benchmark, compare_results, load_results, run_benchmarks, save_results
+
+ROWS = 2000
+TRACE_COMPONENTS = 2000
+
+
+def random_matrix(rows: int, seed: int) -> Matrix:
+    """
+    Create a matrix with random integer rows
+    :param rows: number of rows
+    :param seed: random seed, for reproducible data
+    """
+    generator = random.Random(seed)
+    ret = Matrix(headers=["a", "b", "c"])
+    for _ in range(rows):
+        ret.add_row([generator.randrange(100), generator.randrange(100), generator.randrange(100)])
+    return ret
+
+
+def write_trace_xml(filename: str, count: int) -> None:
+    """
+    Write a trace XML file with a chain of components
+    :param filename: full path and filename
+    :param count: number of components
+    """
+    with open(filename, "wt") as file:
+        file.write(f'<traces><trace from="C0" actual="C0" name="benchmark" status="ok"><components total="{count}">')
+        for i in range(count):
+            destination = f"<destn_id>C{i + 1}</destn_id>" if i + 1 < count else ""
+            file.write(f'<component indx="{i}"><record id="C{i}"><comp_class_desc>Breaker</comp_class_desc>{destination}</record><level>{i % 10}</level></component>')
+        file.write('</components><ends total="0"/></trace></traces>')
+
+
+def append_values(bucket: Bucket) -> None:
+    for value in range(1000):
+        bucket.append(value)
+
+
+def suite(directory: str) -> list:
+    """
+    Create the standard benchmarks
+    :param directory: directory for temporary files
+    :return: list of Benchmark
+    """
+    left, right = random_matrix(ROWS, 1), random_matrix(ROWS, 2)
+    trace_file = os.path.join(directory, "trace.xml")
+    write_trace_xml(trace_file, TRACE_COMPONENTS)
+    return [
+        Benchmark("Matrix.sort", lambda matrix: matrix.sort(), setup=lambda: random_matrix(ROWS, 3), number=1),
+        Benchmark("comm", lambda _: comm(left, right)),
+        Benchmark("subtract", lambda _: subtract(left, right)),
+        Benchmark("Matrix.json", lambda _: left.json()),
+        Benchmark("Bucket.append x1000", append_values, setup=Bucket, number=1),
+        Benchmark("Vector.distance", lambda vectors: vectors[0].distance(vectors[1]), setup=lambda: (Vector(1.0, 2.0, 3.0), Vector(4.0, 5.0, 6.0))),
+        Benchmark("Trace.load_trace_from_xml", lambda _: Trace().load_trace_from_xml(trace_file), repeat=7),
+    ]
+
+
+def main(args=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the tolyn benchmark suite")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1, help="tolerated relative slowdown of the median")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this text")
+    options = parser.parse_args(args)
+    with tempfile.TemporaryDirectory() as directory:
+        benchmarks = [benchmark for benchmark in suite(directory) if options.filter in benchmark.name]
+        results = run_benchmarks(benchmarks)
+    if options.output:
+        save_results(results, options.output)
+    if options.compare:
+        regressions = 0
+        for name, old, new, ratio, status in compare_results(load_results(options.compare), results, options.threshold):
+            print(f"{name:30} {old / 1e3:12.3f} us -> {new / 1e3:12.3f} us  x{ratio:.2f}  {status}")
+            regressions += status == "regression"
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,9 +16,20 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
        
 """
 
+import hashlib
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from sys import intern
+from data.dict import pop_keys
+from data.graph import CompactGraph
+from data.instrumentation import probe
 from data.matrix import Matrix
 from xml.etree import ElementTree
 
+PROGRESS_EVERY = 100000
+CACHE_VERSION = 1  # increase when the layout of TraceTables changes
 
 
 
@@ -113,6 +124,17 @@ class Graph:
 
 
 class Component:
+    """
+    Component of a trace. Components are created by the million, so instances have no __dict__.
+    """
+
+    __slots__ = ("component_id", "ccount", "comp_class", "ems_class", "flags", "index", "level", "phases",
+                 "prev_indx", "trace_class", "comp_class_desc", "connect_class", "connect_class_desc", "dead_state",
+                 "dead_state_desc", "description", "destn_id", "diagram_dressing", "diagram_dressing_desc",
+                 "dsh_dressing", "dsh_dressing_desc", "live_state", "live_state_desc", "normal_priority",
+                 "parent_id", "patch_number", "phase", "phases_present", "phases_present_desc", "priority",
+                 "record_id", "source_id", "status_desc", "sld_class", "sld_class_desc", "substation_id",
+                 "substation_class", "substation_class_desc", "status", "trace_class_desc")
 
     def __init__(self, index=None, component_id: str = None):
         self.component_id = component_id
@@ -125,7 +147,6 @@ class Component:
         self.phases = None
         self.prev_indx = None
         self.trace_class = None
-        self.comp_class = None
         self.comp_class_desc = None
         self.connect_class = None
         self.connect_class_desc = None
@@ -155,15 +176,130 @@ class Component:
         self.substation_class = None
         self.substation_class_desc = None
         self.status = None
-        self.trace_class = None
         self.trace_class_desc = None
 
     def __repr__(self):
         return f"Component: {self.index} {self.component_id}"
 
 
+COMPONENT_FIELDS = frozenset(Component.__slots__)
+# fields with few distinct values, their strings are interned so that all components share one copy
+INTERNED_FIELDS = frozenset(field for field in COMPONENT_FIELDS if field.endswith("_desc") or field.endswith("_class"))
+# fields that refer to another component
+LINK_FIELDS = ("parent_id", "source_id", "destn_id", "substation_id")
+DATA_FIELDS = tuple(field for field in Component.__slots__ if field != "component_id" and field not in LINK_FIELDS)
+
+
+class TraceTables:
+    """
+    Picklable, table based representation of a loaded trace, used to move parsed data between processes.
+    Components refer to each other by component_id, not by object.
+    """
+
+    __slots__ = ("filename", "header", "components", "links")
+
+    def __init__(self, filename: str = None) -> None:
+        self.filename = filename
+        self.header = None  # (from, actual, name, status, expected_components, expected_ends)
+        self.components = []  # (component_id, value per DATA_FIELDS)
+        self.links = []  # (component_id, value per LINK_FIELDS), only for components with at least one link
+
+    def __repr__(self) -> str:
+        return f"TraceTables({self.filename}: components={len(self.components)}, links={len(self.links)})"
+
+
+class TraceTopology:
+    """
+    Topology index over trace components, built once after loading:
+    - flow: source -> component -> destination edges, for downstream and upstream traces
+    - tree: parent -> child edges
+    - substations: components grouped by their substation
+    Both graphs share the same integer id per component. Queries only visit the components they return.
+    """
+
+    def __init__(self, all_components: dict) -> None:
+        """
+        :param all_components: component registry (component_id -> Component)
+        """
+        self.flow = CompactGraph()
+        self.tree = CompactGraph()
+        self.substations = dict()  # substation Component -> list of Component
+        components = list(all_components.values())
+        for component in components:
+            self.flow.add_node(component)
+            self.tree.add_node(component)
+        flow_edges = []
+        tree_edges = []
+        for component in components:
+            if component.source_id is not None:
+                flow_edges.append((component.source_id, component))
+            if component.destn_id is not None:
+                flow_edges.append((component, component.destn_id))
+            if component.parent_id is not None:
+                tree_edges.append((component.parent_id, component))
+            if component.substation_id is not None:
+                self.substations.setdefault(component.substation_id, []).append(component)
+        self.flow.add_edges(flow_edges)
+        self.tree.add_edges(tree_edges)
+
+    @staticmethod
+    def _walk(graph: CompactGraph, component: Component, reverse: bool = False) -> list:
+        """
+        Breadth first walk with CompactGraph.bfs, mapped back to components
+        :param graph: graph to walk
+        :param component: component to start from, not included in the result
+        :param reverse: If True, follow the edges backwards
+        :return: list of components in order of distance
+        """
+        order = graph.bfs(graph.node_id(component), reverse=reverse)
+        return [graph.node(node_id) for node_id in order[1:]]
+
+    def downstream(self, component: Component) -> list:
+        """
+        Get all components that can be reached following destinations
+        :param component: component to start from
+        :return: list of components, nearest first
+        """
+        return self._walk(self.flow, component)
+
+    def upstream(self, component: Component) -> list:
+        """
+        Get all components that can be reached following sources
+        :param component: component to start from
+        :return: list of components, nearest first
+        """
+        return self._walk(self.flow, component, reverse=True)
+
+    def children(self, component: Component) -> list:
+        """
+        Get the components that have this component as parent
+        :param component: parent component
+        :return: list of components
+        """
+        return [self.tree.node(node_id) for node_id in self.tree.neighbors(self.tree.node_id(component))]
+
+    def subtree(self, component: Component) -> list:
+        """
+        Get all descendants of a component in the parent tree
+        :param component: root of the subtree, not included in the result
+        :return: list of components, level by level
+        """
+        return self._walk(self.tree, component)
+
+    def substation_components(self, substation: Component) -> list:
+        """
+        Get the components that belong to a substation
+        :param substation: substation component
+        :return: list of components
+        """
+        return self.substations.get(substation, [])
+
+
 class Trace:
-    def __init__(self):
+    def __init__(self, all_components: dict = None):
+        """
+        :param all_components: component registry (component_id -> Component) to share with other traces
+        """
         # actual data from xml
         self.from_comp = None
         self.actual_comp = None
@@ -175,7 +311,7 @@ class Trace:
         self.ends = []
 
         # helper data
-        self.all_components = dict()
+        self.all_components = dict() if all_components is None else all_components
 
     def __repr__(self):
         return f"Trace: from={self.from_comp} / {self.actual_comp} / {self.name} / {self.status}: components = {len(self.components)}/{self.expected_components}   ends = {len(self.ends)}/{self.expected_ends}"
@@ -204,13 +340,16 @@ class Trace:
         for child in node:
             if child.tag == "record":
                 for record_value in child:
-                    if record_value.tag not in component.__dict__:
-                        raise Exception(f"did not expect field  {record_value.tag} in recordtag {child.tag} for {component}")
-                    component.__setattr__(record_value.tag, record_value.text)
+                    tag, text = record_value.tag, record_value.text
+                    if tag not in COMPONENT_FIELDS:
+                        raise Exception(f"did not expect field  {tag} in recordtag {child.tag} for {component}")
+                    if text is not None and tag in INTERNED_FIELDS:
+                        text = intern(text)
+                    setattr(component, tag, text)
                 continue
             if len(child.attrib):
                 raise Exception(f"did not expect attributes {child.attrib} in tag {child.tag}")
-            if child.tag not in component.__dict__:
+            if child.tag not in COMPONENT_FIELDS:
                 raise Exception(f"did not expect field  {child.tag} in tag {node.tag}")
             component.__setattr__(child.tag, int(child.text))
         component.parent_id = None if component.parent_id is None else self.load_component(component.parent_id)
@@ -221,37 +360,226 @@ class Trace:
 
 
 
-    def load_trace_from_xml(self, filename: str) -> bool:
+    def _start_trace_element(self, path: list) -> None:
+        """
+        Validate and load the attributes of an element as soon as its start tag has been read
+        :param path: elements from the root up to and including the new element
+        """
+        element = path[-1]
+        depth = len(path) - 1
+        if depth == 0:
+            if element.tag != "traces": raise Exception("root is not <traces>")
+        elif depth == 1:
+            if element.tag != "trace": raise Exception(" <traces> child is not <trace>")
+            attributes = element.attrib
+            self.from_comp, self.actual_comp, self.name, self.status = self.load_component(attributes.get('from')), self.load_component(attributes.get('actual')), attributes.get('name'), attributes.get('status')
+            pop_keys(attributes, True, 'from', 'actual', 'name', 'status')
+        elif depth == 2:
+            if element.tag == "components":
+                self.expected_components = element.attrib.get('total')
+            elif element.tag == "ends":
+                self.expected_ends = element.attrib.get('total')
+            else:
+                raise Exception(f"Did no expect /traces/trace/{element.tag}")
+            pop_keys(element.attrib, True, 'total')
+
+    @probe("Trace.load_trace_from_xml", rows=lambda args, result: len(args[0].all_components))
+    def load_trace_from_xml(self, filename: str, progress=None, progress_every: int = PROGRESS_EVERY) -> bool:
         """
         Load an XML_trace result from file
+        The file is parsed incrementally: every <component> is loaded as soon as its end tag is read and then removed
+        from the tree, so memory use depends on the number of open elements and not on the size of the file.
         :param filename: full path and filename
+        :param progress: Optional callback progress(components_loaded, bytes_read, file_size)
+        :param progress_every: Number of components between two progress calls
         :return: Successfully or not
         """
         try:
-            root = ElementTree.parse(filename).getroot()
-            if root.tag != "traces": raise Exception("root is not <traces>")
-            for trace  in root:
-                if trace.tag != "trace": raise Exception(" <traces> child is not <trace>")
-                self.from_comp, self.actual_comp, self.name, self.status = self.load_component(trace.attrib.get('from')), self.load_component(trace.attrib.get('actual')), trace.attrib.get('name'), trace.attrib.get('status')
-                pop_keys(trace.attrib, True, 'from', 'actual', 'name', 'status')
-                for child in trace:
-                    if child.tag == "components":
-                        self.expected_components = child.attrib.get('total')
-                        pop_keys(child.attrib, True, 'total')
-                        for sub_child in child:
-                            self.load_trace_component(sub_child)
-
-                    elif child.tag == "ends":
-                        self.expected_ends = child.attrib.get('total')
-                        pop_keys(child.attrib, True, 'total')
-                    else:
-                        raise Exception(f"Did no expect /traces/trace/{child.tag}")
+            size = os.path.getsize(filename)
+            count = 0
+            with open(filename, "rb") as file:
+                path = []  # open elements, from the root to the current element
+                for event, element in ElementTree.iterparse(file, events=("start", "end")):
+                    if event == "start":
+                        path.append(element)
+                        self._start_trace_element(path)
+                        continue
+                    path.pop()
+                    if len(path) == 3 and path[-1].tag == "components":
+                        self.load_trace_component(element)
+                        count += 1
+                        if progress is not None and count % progress_every == 0:
+                            progress(count, file.tell(), size)
+                    if 0 < len(path) <= 3:
+                        path[-1].remove(element)  # the finished element is the only child left
+            if progress is not None:
+                progress(count, size, size)
         except Exception as e:
             print(e)
             return False
         return True
 
+    def to_tables(self, filename: str = None) -> TraceTables:
+        """
+        Convert the trace and all its components to tables
+        :param filename: source of the trace
+        :return: TraceTables
+        """
+        def _id(component):
+            return None if component is None else component.component_id
+
+        tables = TraceTables(filename)
+        tables.header = (_id(self.from_comp), _id(self.actual_comp), self.name, self.status, self.expected_components, self.expected_ends)
+        for component_id, component in self.all_components.items():
+            tables.components.append((component_id,) + tuple([getattr(component, field) for field in DATA_FIELDS]))
+            links = tuple([_id(getattr(component, field)) for field in LINK_FIELDS])
+            if links != (None,) * len(LINK_FIELDS):
+                tables.links.append((component_id,) + links)
+        return tables
+
+    def topology(self) -> TraceTopology:
+        """
+        Build the topology index of all components, typically once after loading
+        :return: TraceTopology
+        """
+        return TraceTopology(self.all_components)
+
+    def load_trace_cached(self, filename: str, cache_dir: str) -> bool:
+        """
+        Load an XML_trace result, from the binary cache if the file did not change since it was cached
+        :param filename: full path and filename
+        :param cache_dir: directory of the cache files
+        :return: Successfully or not
+        """
+        tables = read_trace_tables(filename, cache_dir)
+        if tables is None:
+            return False
+        self.load_tables(tables)
+        return True
+
+    def load_tables(self, tables: TraceTables) -> None:
+        """
+        Load a trace from tables. Components are resolved through the component registry, so components that are
+        already known are updated instead of duplicated. Values that are None in the tables do not overwrite values.
+        :param tables: TraceTables
+        """
+        load_component = self.load_component
+        from_id, actual_id, self.name, self.status, self.expected_components, self.expected_ends = tables.header
+        self.from_comp, self.actual_comp = load_component(from_id), load_component(actual_id)
+        for row in tables.components:
+            component = load_component(row[0])
+            for field, value in zip(DATA_FIELDS, row[1:]):
+                if value is not None:
+                    setattr(component, field, intern(value) if field in INTERNED_FIELDS and isinstance(value, str) else value)
+        for row in tables.links:
+            component = load_component(row[0])
+            for field, value in zip(LINK_FIELDS, row[1:]):
+                if value is not None:
+                    setattr(component, field, load_component(value))
+
+
+def _cache_filename(filename: str, cache_dir: str) -> str:
+    """
+    Get the name of the cache file of a trace XML file
+    :param filename: full path and filename of the XML file
+    :param cache_dir: directory of the cache files
+    :return: full path and filename of the cache file
+    """
+    digest = hashlib.sha1(os.path.abspath(filename).encode()).hexdigest()
+    return os.path.join(cache_dir, f"{digest}.trace.pickle")
+
+
+def _read_cache(filename: str, cache_dir: str) -> TraceTables:
+    """
+    Read the cached tables of a trace XML file
+    :param filename: full path and filename of the XML file
+    :param cache_dir: directory of the cache files
+    :return: TraceTables, or None if there is no cache or it is outdated
+    """
+    stat = os.stat(filename)
+    key = (CACHE_VERSION, os.path.abspath(filename), stat.st_mtime_ns, stat.st_size)
+    try:
+        with open(_cache_filename(filename, cache_dir), "rb") as file:
+            if pickle.load(file) != key:
+                return None
+            return pickle.load(file)
+    except Exception:
+        return None  # no cache, or unreadable: parse the XML again
+
+
+def _write_cache(filename: str, cache_dir: str, tables: TraceTables, stat: os.stat_result) -> bool:
+    """
+    Write the tables of a trace XML file to the cache. The file is written under a temporary name and then renamed,
+    so readers never see a partial cache file. Like reading, writing is best-effort: on failure there is no cache.
+    :param filename: full path and filename of the XML file
+    :param cache_dir: directory of the cache files
+    :param tables: tables to cache
+    :param stat: status of the XML file before it was parsed
+    :return: True if the cache file was written
+    """
+    temporary = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_filename = _cache_filename(filename, cache_dir)
+        temporary = f"{cache_filename}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            pickle.dump((CACHE_VERSION, os.path.abspath(filename), stat.st_mtime_ns, stat.st_size), file, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(tables, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, cache_filename)
+        return True
+    except (OSError, pickle.PicklingError, TypeError):
+        if temporary is not None:
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+        return False
+
 
+def read_trace_tables(filename: str, cache_dir: str = None) -> TraceTables:
+    """
+    Load a single trace XML file into tables, typically in a worker process
+    :param filename: full path and filename
+    :param cache_dir: If provided, the tables are read from a cache file in this directory as long as path, mtime and
+    size of the XML file did not change. Otherwise the XML is parsed and the cache is (re)written.
+    :return: TraceTables, or None if the file could not be loaded
+    """
+    if cache_dir is not None:
+        if not os.path.exists(filename):
+            return None
+        tables = _read_cache(filename, cache_dir)
+        if tables is not None:
+            return tables
+        stat = os.stat(filename)
+    trace = Trace()
+    if not trace.load_trace_from_xml(filename):
+        return None
+    tables = trace.to_tables(filename)
+    if cache_dir is not None:
+        _write_cache(filename, cache_dir, tables, stat)
+    return tables
+
+
+def load_traces_from_xml(filenames, all_components: dict = None, processes: int = None, cache_dir: str = None) -> list:
+    """
+    Load many trace XML files in parallel. The files are parsed in a process pool, the resulting tables are merged in
+    this process into one component registry, so that a component_id refers to the same Component in all traces.
+    :param filenames: iterable of full paths and filenames
+    :param all_components: component registry to merge into, a new one is created if not provided
+    :param processes: number of worker processes, default the number of CPUs
+    :param cache_dir: directory for cached parse results, see read_trace_tables(). None disables caching
+    :return: list of Trace, in the order of filenames. None for files that could not be loaded
+    """
+    all_components = dict() if all_components is None else all_components
+    ret = []
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for tables in executor.map(partial(read_trace_tables, cache_dir=cache_dir), filenames):
+            trace = None
+            if tables is not None:
+                trace = Trace(all_components)
+                trace.load_tables(tables)
+            ret.append(trace)
+    return ret
 
 
 if __name__ == "__main__":
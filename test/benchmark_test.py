@@ -0,0 +1,53 @@
+"""
+This file is part of tolyn.
+
+tolyn is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import os
+import tempfile
+import unittest
+
+from testing.benchmark import Benchmark, BenchmarkException, compare_results, load_results, run_benchmarks, save_results
+
+
+class MyTestCase(unittest.TestCase):
+    def test_run_and_compare(self):
+        calls = []
+        benchmark = Benchmark("append", lambda target: target.append(1), setup=lambda: calls, number=3, repeat=4, warmup=1)
+        results = run_benchmarks([benchmark], report=None)
+        self.assertEqual(15, len(calls))
+        self.assertEqual(4, results["append"].timings.count())
+        self.assertRaises(BenchmarkException, run_benchmarks, [benchmark, benchmark], None)
+        handle, filename = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+        try:
+            save_results(results, filename)
+            baseline = load_results(filename)
+        finally:
+            os.remove(filename)
+        self.assertEqual(3, baseline["append"]["number"])
+        current = {"append": dict(baseline["append"], median=baseline["append"]["median"] * 2, mad=0)}
+        baseline["append"]["mad"] = 0
+        self.assertEqual("regression", compare_results(baseline, current)[0][4])
+        self.assertEqual("unchanged", compare_results(baseline, baseline)[0][4])
+
+    def test_calibrate(self):
+        benchmark = Benchmark("noop", lambda _: None, min_time_ns=1_000_000)
+        self.assertGreater(benchmark.calibrate(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
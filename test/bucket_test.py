@@ -28,6 +28,35 @@ class MyTestCase(unittest.TestCase):
         self.assertRaises(BucketException, b.avg)
         self.assertRaises(BucketException, b.max)
         self.assertRaises(BucketException, b.min)
+        self.assertRaises(BucketException, b.median)
+
+    def test_order_statistics(self):
+        b = Bucket(store_values=True)
+        for value in [4, 1, 100, 2, 3]:
+            b.append(value)
+        self.assertEqual(3, b.median())
+        self.assertEqual(1, b.mad())
+        self.assertEqual(1, b.percentile(0))
+        self.assertEqual(100, b.percentile(100))
+        self.assertEqual(2.5, b.percentile(37.5))
+        self.assertRaises(BucketException, b.percentile, 101)
+
+    def test_from_statistics(self):
+        b = Bucket.from_statistics(2, 10, 4, 6)
+        self.assertEqual((2, 10, 4, 6, 5), (b.count(), b.total, b.min(), b.max(), b.avg()))
+        self.assertRaises(BucketException, Bucket.from_statistics(0, 0, None, None).min)
+
+    def test_merge(self):
+        a, b = Bucket(store_values=True), Bucket(store_values=True)
+        for value in (5, 3):
+            a.append(value)
+        for value in (9, 1):
+            b.append(value)
+        self.assertIs(a, a.merge(b))
+        self.assertEqual((4, 18, 1, 9), (a.count(), a.total, a.min(), a.max()))
+        self.assertEqual([5, 3, 9, 1], list(a))
+        self.assertIs(a, a.merge(Bucket(store_values=True)))
+        self.assertRaises(BucketException, a.merge, Bucket())
 
 
 if __name__ == '__main__':
@@ -0,0 +1,141 @@
+""" 
+This file is part of tolyn.    
+
+tolyn is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+       
+"""
+
+import threading
+from collections import OrderedDict
+import unittest
+
+from data.cache import Cache, CacheException, memoize
+from data.dict import KeyNotFoundException
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class MyTestCase(unittest.TestCase):
+    def test_lru(self):
+        cache = Cache(max_size=2)
+        cache['A'] = 1
+        cache['B'] = 2
+        self.assertEqual(1, cache['A'])
+        cache['C'] = 3
+        self.assertEqual(['A', 'C'], list(cache.keys()))
+        self.assertIsNone(cache.get('B'))
+        self.assertRaises(KeyError, cache.__getitem__, 'B')
+        self.assertEqual({"hits": 1, "misses": 2, "evictions": 1, "size": 2, "weight": 2}, cache.counters())
+        cache.reset_counters()
+        self.assertEqual(0, cache.hits)
+
+    def test_eviction_order(self):
+        cache = Cache(max_size=3)
+        for key in 'ABC':
+            cache[key] = key
+        cache.get('A')
+        cache['D'] = 'D'  # evicts B, the least recently used
+        self.assertEqual(['C', 'A', 'D'], list(cache.order))
+        cache.get('C')
+        cache['E'] = 'E'
+        self.assertEqual(['D', 'C', 'E'], list(cache.order))
+        self.assertEqual(2, cache.evictions)
+
+        cache = Cache(max_size=1000)
+        for i in range(3000):
+            cache[i] = i
+        self.assertEqual(2000, cache.evictions)
+        self.assertIsInstance(cache.order, OrderedDict)  # O(1) move_to_end and eviction from the front
+        self.assertEqual(list(range(2000, 3000)), list(cache.order))  # the bookkeeping does not grow with the puts
+        self.assertEqual(set(cache), set(cache.order))
+
+    def test_weight(self):
+        cache = Cache(max_weight=10, weigher=lambda key, value: len(value))
+        cache.put('A', 'aaaa')
+        cache.put('B', 'bbbb')
+        self.assertEqual(8, cache.weight)
+        cache.put('C', 'ccc')
+        self.assertEqual(['B', 'C'], list(cache))
+        self.assertEqual(7, cache.weight)
+        del cache['B']
+        self.assertEqual(3, cache.weight)
+        self.assertEqual('ccc', cache.pop('C'))
+        self.assertEqual(0, cache.weight)
+        self.assertRaises(CacheException, Cache, max_weight=-1)
+
+    def test_ttl(self):
+        clock = Clock()
+        cache = Cache(ttl=10, clock=clock)
+        cache['A'] = 1
+        cache.put('B', 2, ttl=20)
+        clock.now = 15
+        self.assertNotIn('A', cache)
+        self.assertEqual(2, cache['B'])
+        cache['C'] = 3
+        clock.now = 30
+        self.assertEqual(2, cache.purge())
+        self.assertEqual(0, len(cache))
+
+    def test_dict_api(self):
+        cache = Cache(max_size=3)
+        cache.update_from_pairs(keys=['A', 'B', 'C', 'D'], values=[1, 2, 3, 4])
+        self.assertEqual(['B', 'C', 'D'], cache.keyslist())
+        self.assertEqual(1, cache.evictions)
+        self.assertRaises(KeyNotFoundException, cache.pop_many, ['B', 'X'])
+        self.assertEqual([2, None], cache.pop_many(['B', 'X'], default=None))
+        self.assertEqual(5, cache.setdefault('E', 5))
+        self.assertEqual(['C', 'D', 'E'], cache.keyslist())
+        cache.clear()
+        self.assertEqual(0, cache.weight)
+
+    def test_thread_safe(self):
+        cache = Cache(max_size=50, thread_safe=True)
+
+        def work(offset):
+            for i in range(1000):
+                cache[(offset, i % 100)] = i
+                cache.get((offset, i % 70))
+
+        threads = [threading.Thread(target=work, args=(offset,)) for offset in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(50, len(cache))
+        self.assertEqual(4000, cache.hits + cache.misses)
+
+    def test_memoize(self):
+        calls = []
+
+        @memoize(max_size=2)
+        def square(value, offset=0):
+            calls.append(value)
+            return value * value + offset
+
+        self.assertEqual(4, square(2))
+        self.assertEqual(4, square(2))
+        self.assertEqual(5, square(2, offset=1))
+        self.assertEqual([2, 2], calls)
+        self.assertEqual(1, square.cache.hits)
+        self.assertEqual("square", square.__name__)
+
+
+if __name__ == '__main__':
+    unittest.main()
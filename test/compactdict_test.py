@@ -0,0 +1,102 @@
+""" 
+This file is part of tolyn.    
+
+tolyn is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+       
+"""
+
+import os
+import tempfile
+import unittest
+from array import array
+
+from data.compactdict import CompactDict, CompactDictException, FrozenException
+from data.dict import DictException, KeyNotFoundException
+
+KEYS = ['A', 'B', 'C', 'D']
+VALUES = [4, 3, 2, 1]
+TEST_DATA = [(KEYS[i], VALUES[i]) for i in range(len(KEYS))]
+
+
+class MyTestCase(unittest.TestCase):
+    def test_mapping(self):
+        d = CompactDict(TEST_DATA)
+        self.assertEqual(4, len(d))
+        self.assertEqual(3, d['B'])
+        self.assertIn('C', d)
+        self.assertNotIn('X', d)
+        self.assertNotIn(1, d)
+        self.assertIsNone(d.get('X'))
+        d['B'] = 30
+        d['é'] = 5
+        self.assertEqual([4, 30, 2, 1, 5], d.valueslist())
+        del d['A']
+        self.assertRaises(KeyError, d.__getitem__, 'A')
+        self.assertEqual(['B', 'C', 'D', 'é'], d.keyslist())
+        self.assertEqual(2, d.pop('C'))
+        self.assertEqual(0, d.pop('C', 0))
+        self.assertEqual({'B': 30, 'D': 1, 'é': 5}, dict(d.items()))
+        self.assertRaises(CompactDictException, d.__setitem__, 1, 1)
+
+    def test_growth(self):
+        d = CompactDict()
+        for i in range(5000):
+            d[f"key{i}"] = i
+        for i in range(0, 5000, 2):
+            del d[f"key{i}"]
+        for i in range(5000, 6000):
+            d[f"key{i}"] = i
+        self.assertEqual(3500, len(d))
+        self.assertEqual(list(range(1, 5000, 2)) + list(range(5000, 6000)), d.valueslist())
+        self.assertTrue(all(d[f"key{i}"] == i for i in range(1, 6000, 2)))
+        self.assertNotIn("key10", d)
+
+    def test_dict_api(self):
+        d = CompactDict()
+        d.update_from_pairs(keys=KEYS, values=array('q', VALUES))
+        self.assertIs(d.keys_snapshot(), d.keys_snapshot())
+        d.keyslist().append('X')
+        self.assertEqual(KEYS, d.keyslist())
+        self.assertIsNone(d.remove_keys('B', 'C'))
+        self.assertRaises(KeyError, d.remove_keys, 'A', raise_if_not_empty=True)
+        self.assertEqual(['D'], d.keyslist())
+        self.assertRaises(KeyNotFoundException, d.remove_many, iter(['D', 'X']))
+        d.remove_many(['D', 'X'], ignore_missing=True, raise_if_not_empty=True)
+        self.assertEqual(0, len(d))
+        self.assertRaises(DictException, d.update_from_pairs, keys=KEYS, values=VALUES[1:])
+
+    def test_freeze_and_save(self):
+        d = CompactDict(dict(TEST_DATA))
+        del d['A']
+        d.freeze()
+        self.assertRaises(FrozenException, d.__setitem__, 'E', 0)
+        self.assertEqual(['B', 'C', 'D'], d.keyslist())
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "table.cd")
+            d.save(filename)
+            for use_mmap in (True, False):
+                loaded = CompactDict.load(filename, use_mmap=use_mmap)
+                self.assertTrue(loaded.frozen)
+                self.assertEqual(dict(d.items()), dict(loaded.items()))
+                self.assertEqual(2, loaded['C'])
+                self.assertNotIn('A', loaded)
+                self.assertRaises(FrozenException, loaded.pop, 'B')
+                loaded.close()
+            with open(filename, "r+b") as file:
+                file.write(b"X")
+            self.assertRaises(CompactDictException, CompactDict.load, filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
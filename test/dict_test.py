@@ -17,7 +17,9 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 import unittest
-from data.dict import Dict, DictException
+from array import array
+
+from data.dict import Dict, DictException, KeyNotFoundException, SnapshotDict
 
 KEYS = ['A', 'B', 'C', 'D']
 VALUES = [4, 3, 2, 1]
@@ -39,6 +41,53 @@ class MyTestCase(unittest.TestCase):
         d.update(TEST_DATA)
         self.assertEqual(KEYS, d.keyslist())
         self.assertEqual(VALUES, d.valueslist())
+        d.keyslist().append('X')
+        self.assertEqual(KEYS, d.keyslist())
+
+    def test_snapshots(self):
+        d = SnapshotDict(TEST_DATA)
+        self.assertEqual(tuple(KEYS), d.keys_snapshot())
+        self.assertIs(d.keys_snapshot(), d.keys_snapshot())
+        d.keyslist().append('X')
+        self.assertEqual(KEYS, d.keyslist())
+        d['E'] = 0
+        self.assertEqual(KEYS + ['E'], d.keyslist())
+        self.assertEqual(tuple(VALUES + [0]), d.values_snapshot())
+        del d['A']
+        self.assertEqual(KEYS[1:] + ['E'], d.keyslist())
+        d.remove_many(['B'])
+        self.assertEqual(('C', 'D', 'E'), d.keys_snapshot())
+        d.update_from_pairs(keys=['F'], values=[6])
+        self.assertEqual((2, 1, 0, 6), d.values_snapshot())
+        d.clear()
+        self.assertEqual((), d.keys_snapshot())
+
+    def test_pop_many(self):
+        d = Dict(TEST_DATA)
+        self.assertRaises(KeyNotFoundException, d.pop_many, ['A', 'X'])
+        self.assertEqual(KEYS, d.keyslist())
+        self.assertEqual([4, 3, None], d.pop_many(iter(['A', 'B', 'X']), default=None))
+        self.assertEqual(['C', 'D'], d.keyslist())
+        self.assertRaises(DictException, d.pop_many, ['C'], raise_if_not_empty=True)
+        self.assertEqual([1], d.pop_many(['D'], raise_if_not_empty=True))
+
+    def test_remove_many(self):
+        d = Dict(TEST_DATA)
+        self.assertRaises(KeyNotFoundException, d.remove_many, ['A', 'X'])
+        self.assertEqual(4, len(d))
+        d.remove_many(['A', 'X'], ignore_missing=True)
+        self.assertEqual(['B', 'C', 'D'], d.keyslist())
+        self.assertRaises(DictException, d.remove_many, ['B'], raise_if_not_empty=True)
+
+    def test_update_from_pairs(self):
+        d = Dict()
+        d.update_from_pairs(keys=KEYS, values=array('i', VALUES))
+        self.assertEqual(VALUES, d.valueslist())
+        d.update_from_pairs(pairs=(('A', 0), ('E', 5)))
+        self.assertEqual([0, 3, 2, 1, 5], d.valueslist())
+        self.assertRaises(DictException, d.update_from_pairs, keys=KEYS, values=VALUES[1:])
+        self.assertRaises(DictException, d.update_from_pairs, keys=KEYS)
+        self.assertRaises(DictException, d.update_from_pairs, TEST_DATA, keys=KEYS)
 
 
 if __name__ == '__main__':
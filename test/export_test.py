@@ -0,0 +1,74 @@
+"""
+This file is part of tolyn.
+
+tolyn is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from data.export import ChromeTraceSink, CsvSink, ExportError
+from data.stopwatch import Profiler, Stopwatch
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_chrome_trace(self):
+        filename = os.path.join(self.directory.name, "trace.json")
+        with ChromeTraceSink(filename, flush_interval=None) as sink:
+            profiler = Profiler(sink=sink)
+            with profiler.span("outer"):
+                with profiler.span("inner"):
+                    pass
+            sink.flush()
+            stopwatch = Stopwatch(sink=sink)
+            stopwatch.click_lap("lap")
+        with open(filename) as file:
+            events = json.load(file)
+        self.assertEqual(["inner", "outer", "lap"], [event["name"] for event in events])
+        self.assertEqual({"X"}, {event["ph"] for event in events})
+        self.assertEqual(3, sink.written)
+        span_ts, lap_ts = events[1]["ts"], events[2]["ts"]
+        self.assertLessEqual(span_ts, lap_ts)
+        self.assertLess(lap_ts - span_ts, 60 * 1e6)  # same clock: within a minute, in µs
+
+    def test_csv_ring_buffer(self):
+        filename = os.path.join(self.directory.name, "spans.csv")
+        sink = CsvSink(filename, capacity=2, flush_interval=None)
+        for i in range(5):
+            sink.record(f"span{i}", i, 1, thread_id=1)
+        sink.close()
+        with open(filename) as file:
+            lines = file.read().splitlines()
+        self.assertEqual(["name;category;start_ns;duration_ns;thread", "span3;;3;1;1", "span4;;4;1;1"], lines)
+        self.assertEqual(3, sink.dropped)
+        self.assertRaises(ExportError, CsvSink, filename, capacity=0)
+
+    def test_max_laps(self):
+        stopwatch = Stopwatch(max_laps=2)
+        for i in range(5):
+            stopwatch.click_lap(f"lap{i}")
+        self.assertEqual(["lap3", "lap4"], [lap.name for lap in stopwatch.laps])
+
+
+if __name__ == '__main__':
+    unittest.main()
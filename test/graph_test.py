@@ -0,0 +1,70 @@
+"""
+This file is part of tolyn.
+
+tolyn is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import unittest
+
+from data.graph import CompactGraph, GraphException
+
+
+class MyTestCase(unittest.TestCase):
+    def test_compact_graph(self):
+        g = CompactGraph(weighted=True)
+        g.add_edges([('A', 'B', 2.0), ('A', 'C'), ('C', 'A', 5.0)])
+        a, b, c = g.node_id('A'), g.node_id('B'), g.node_id('C')
+        self.assertEqual(3, g.node_count())
+        self.assertEqual([b, c], list(g.neighbors(a)))
+        self.assertEqual([2.0, 1.0], list(g.neighbor_weights(a)))
+        self.assertEqual([c], list(g.predecessors(a)))
+        self.assertEqual(0, g.degree(b))
+        self.assertRaises(GraphException, g.node_id, 'D')
+        g.add_edge('B', 'D')
+        self.assertEqual([g.node_id('D')], list(g.neighbors(b)))
+
+    def test_undirected_bulk(self):
+        g = CompactGraph(directed=False)
+        for node in range(4):
+            g.add_node(node)
+        g.add_edges_from_ids([0, 1], [1, 2])
+        self.assertEqual([0, 2], sorted(g.neighbors(1)))
+        self.assertRaises(GraphException, g.add_edges_from_ids, [0], [4])
+
+    def test_traversal(self):
+        g = CompactGraph()
+        g.add_edges([(0, 1), (0, 2), (1, 3), (2, 3), (3, 4), (5, 6)])
+        self.assertEqual([0, 1, 2, 3, 4], list(g.bfs(0)))
+        self.assertEqual([0, 1, 3, 4, 2], list(g.dfs(0)))
+        self.assertEqual([4, 3, 1, 2, 0], list(g.bfs(4, reverse=True)))
+        self.assertTrue(g.reachable(0, 4))
+        self.assertFalse(g.reachable(4, 0))
+        self.assertTrue(g.reachable(5, 5))
+        self.assertEqual([0, 1, 2], list(g.bfs(0, until=2)))  # stops before visiting 3 and 4
+        self.assertEqual([0], list(g.bfs(0, until=0)))
+        self.assertEqual([0, 0, 0, 0, 0, 1, 1], list(g.connected_components()))
+
+    def test_shortest_path(self):
+        g = CompactGraph(weighted=True)
+        g.add_edges([('A', 'B', 1.0), ('B', 'C', 1.0), ('A', 'C', 5.0), ('C', 'D', 1.0)])
+        ids = [g.node_id(node) for node in 'ABCD']
+        distances, _ = g.shortest_paths(ids[0])
+        self.assertEqual([0.0, 1.0, 2.0, 3.0], [distances[i] for i in ids])
+        self.assertEqual(ids, g.shortest_path(ids[0], ids[3]))
+        self.assertEqual([], g.shortest_path(ids[3], ids[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+This file is part of tolyn.
+
+tolyn is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import unittest
+
+from data import instrumentation
+from data.bucketlist import Bucket
+from data.instrumentation import InstrumentationException, probe
+
+
+@probe("test.double", rows=lambda args, result: len(args[0]))
+def double(values):
+    return values * 2
+
+
+class MyTestCase(unittest.TestCase):
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled(self):
+        self.assertEqual([1, 1], double([1]))
+        self.assertNotIn("test.double", instrumentation.snapshot())
+
+    def test_enabled(self):
+        instrumentation.enable("test.double", "Bucket.append")
+        double([1, 2])
+        double([1, 2, 3, 4])
+        bucket = Bucket()
+        bucket.append(1)
+        snapshot = instrumentation.snapshot()
+        self.assertEqual(2, snapshot["test.double"]["calls"])
+        self.assertEqual(6, snapshot["test.double"]["rows"].total)
+        self.assertEqual(4, snapshot["test.double"]["rows"].max())
+        self.assertGreater(snapshot["test.double"]["duration"].total, 0)
+        self.assertEqual(1, snapshot["Bucket.append"]["calls"])
+        instrumentation.disable("test.double")
+        double([1])
+        self.assertEqual(2, instrumentation.snapshot()["test.double"]["calls"])
+        self.assertEqual("double", double.__name__)
+
+    def test_methods_rebound(self):
+        original = Bucket.__dict__["append"]
+        self.assertFalse(hasattr(original, "__wrapped__"))
+        instrumentation.enable("Bucket.append")
+        self.assertIs(original, Bucket.__dict__["append"].__wrapped__)
+        instrumentation.disable("Bucket.append")
+        self.assertIs(original, Bucket.__dict__["append"])
+
+    def test_unknown(self):
+        self.assertRaises(InstrumentationException, instrumentation.enable, "no such probe")
+
+
+if __name__ == '__main__':
+    unittest.main()
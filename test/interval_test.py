@@ -0,0 +1,82 @@
+"""
+This file is part of tolyn.
+
+tolyn is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import unittest
+from array import array
+
+from data.interval import Interval, IntervalException, IntervalSet, complement, difference, intersection, normalize, union
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.intervals = IntervalSet([
+            Interval(None, 0, False, False),  # ]-INF, 0[
+            Interval(0, 10),  # [0, 10]
+            Interval(5, 15, False, False),  # ]5, 15[
+            Interval(15, None, True, False),  # [15, +INF[
+        ])
+
+    def test_containing(self):
+        self.assertEqual([0], self.intervals.containing_indices(-1000))
+        self.assertEqual([1], sorted(self.intervals.containing_indices(0)))
+        self.assertEqual([1], sorted(self.intervals.containing_indices(5)))
+        self.assertEqual([1, 2], sorted(self.intervals.containing_indices(10)))
+        self.assertEqual([3], sorted(self.intervals.containing_indices(15)))
+        self.assertIn(20, self.intervals)
+
+    def test_overlapping(self):
+        self.assertEqual([1, 2], sorted(self.intervals.overlapping_indices(Interval(10, 15, True, False))))
+        self.assertEqual([2], sorted(self.intervals.overlapping_indices(Interval(10, 15, False, False))))
+        self.assertEqual([0, 1], sorted(self.intervals.overlapping_indices(Interval(-1, 5))))
+        self.assertEqual([0, 1, 2, 3], sorted(self.intervals.overlapping_indices(Interval(None, None, False, False))))
+
+    def test_classify(self):
+        self.assertEqual([[0], [1], [1, 2], [3]], self.intervals.classify([-1, 0, 10, 15]))
+        self.assertEqual([0, 1, 1, 3], self.intervals.classify([-1, 0, 10, 15], first_only=True))
+        self.assertEqual([-1], IntervalSet([Interval(0, 1)]).classify([2], first_only=True))
+
+    def test_normalize(self):
+        self.assertEqual([Interval(0, 3)], normalize([Interval(2, 3), Interval(0, 2, True, False)]))
+        self.assertEqual(2, len(normalize([Interval(0, 2, True, False), Interval(2, 3, False, True)])))
+        self.assertEqual([Interval(0, 3)], list(IntervalSet([Interval(1, 3), Interval(0, 1)]).normalized()))
+
+    def test_algebra(self):
+        left = [Interval(0, 10)]
+        right = [Interval(5, 15, False, False)]
+        self.assertEqual([Interval(0, 15, True, False)], union(left, right))
+        self.assertEqual([Interval(5, 10, False, True)], intersection(left, right))
+        self.assertEqual([Interval(0, 5)], difference(left, right))
+        self.assertEqual([Interval(None, 0, False, False), Interval(10, None, False, False)], complement(left))
+        self.assertEqual([], complement([Interval(None, None, False, False)]))
+        self.assertEqual([Interval(0, 5)], list(IntervalSet(left) - IntervalSet(right)))
+
+    def test_reduce_values(self):
+        self.assertEqual([0, 3, 5], Interval(0, 5).reduce_values([-1, 3, 9]))
+        self.assertEqual(array('d', [0, 3, 5]), Interval(0, 5).reduce_values(array('d', [-1, 3, 9])))
+        self.assertEqual([-100, 5], Interval(None, 5, False, True).reduce_values([-100, 7]))
+        self.assertEqual(5, Interval(None, 5, False, True).reduce_value(7))
+        self.assertRaises(IntervalException, Interval(0, 5, False, True).reduce_values, [-1, 3])
+
+    def test_contains_many(self):
+        self.assertEqual([False, True, True, False], Interval(0, 5, False, True).contains_many([0, 1, 5, 6]))
+        self.assertEqual([True, True, False], Interval(None, 5, False, False).contains_many([-100, 4, 5]))
+        self.assertEqual([False, True], Interval(0, None, True, False).contains_many([-1, 10 ** 9]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+This file is part of tolyn.
+
+tolyn is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import asyncio
+import gc
+import threading
+import unittest
+
+from data.stopwatch import ConcurrentStopwatch, Profiler, SamplingProfiler, Stopwatch, StopwatchError
+
+
+class MyTestCase(unittest.TestCase):
+    def test_profiler(self):
+        profiler = Profiler()
+
+        @profiler.span("step")
+        def step(value):
+            return value * 2
+
+        with profiler.span("outer"):
+            for i in range(3):
+                self.assertEqual(2 * i, step(i))
+        step(1)
+        buckets = profiler.buckets()
+        self.assertEqual([("outer",), ("outer", "step"), ("step",)], sorted(buckets))
+        self.assertEqual(1, buckets[("outer",)].count())
+        self.assertEqual(3, buckets[("outer", "step")].count())
+        self.assertGreaterEqual(buckets[("outer",)].total, buckets[("outer", "step")].total)
+        self.assertEqual(3, len(profiler.report_texts()))
+        self.assertEqual("step", step.__name__)
+
+    def test_profiler_reset(self):
+        profiler = Profiler()
+        with profiler.span("open"):
+            self.assertRaises(StopwatchError, profiler.reset)
+        profiler.reset()
+        self.assertEqual({}, profiler.buckets())
+
+    def test_concurrent_stopwatch(self):
+        stopwatch = ConcurrentStopwatch()
+        stopwatch.click_lap("main")
+
+        async def task(name):
+            stopwatch.click_lap(f"{name} start")
+            await asyncio.sleep(0)
+            stopwatch.click_lap(f"{name} end")
+
+        async def run():
+            await asyncio.gather(task("a"), task("b"))
+
+        asyncio.run(run())
+        thread = threading.Thread(target=stopwatch.click_lap, args=("thread",))
+        thread.start()
+        thread.join()
+        stopwatch.click_stop("stop")
+        self.assertRaises(StopwatchError, stopwatch.click_lap)
+        self.assertEqual(4, len(stopwatch.timelines))
+        laps = stopwatch.laps()
+        self.assertEqual(["main", "a start", "b start", "a end", "b end", "thread", "stop"], [lap[3] for lap in laps])
+        self.assertEqual(sorted(lap[0] for lap in laps), [lap[0] for lap in laps])
+        a_start, a_end = laps[1], laps[3]
+        self.assertEqual(a_end[0] - a_start[0], a_end[1])
+        self.assertEqual(9, len(stopwatch.lap_texts()))
+        gc.collect()
+        tasks = [timeline.task for timeline in stopwatch.timelines if timeline.task is not None]
+        self.assertEqual([None, None], [task() for task in tasks])  # finished tasks are not kept alive
+
+    def test_sampling_profiler(self):
+        sampler = SamplingProfiler(thread_id=threading.get_ident())
+        stopwatch = Stopwatch(sampler=sampler)
+        sampler.sample()
+        sampler.sample()
+        stopwatch.click_lap("sampled")
+        stopwatch.click_lap("empty")
+        self.assertEqual(2, sum(stopwatch.laps[0].samples.values()))
+        self.assertEqual({}, stopwatch.laps[1].samples)
+        label, count, fraction = sampler.hottest()[0]
+        self.assertTrue(label.startswith("sample ("))
+        self.assertEqual((2, 1.0), (count, fraction))
+        self.assertTrue(sampler.folded().endswith(" 2"))
+        self.assertIn("test_sampling_profiler", sampler.folded())
+        self.assertIn("hottest: sample", stopwatch.laps[0].indented_repr(0))
+        self.assertRaises(StopwatchError, SamplingProfiler, rate=0)
+        with sampler:
+            self.assertRaises(StopwatchError, sampler.start)
+
+
+if __name__ == '__main__':
+    unittest.main()
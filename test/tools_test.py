@@ -0,0 +1,178 @@
+""" 
+This file is part of tolyn.    
+
+tolyn is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+       
+"""
+
+import operator
+import unittest
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from data.bucketlist import Bucket
+from data.matrix import Matrix
+from data.tools import ChunkException, PrefixMatcher, ToolsException, chunks, coalesce, coalesce_columns, \
+    count_nones, count_nones_in, count_not_nones, count_not_nones_in, find_non_none, get_first_non_none, \
+    iter_chunks, matrix_none_counts, none_mask, none_or_empty, none_or_empty_mask, parallel_map, parallel_reduce, \
+    split_list, starts_with_from_list
+
+VALUES = [0, None, '', [], 'a', None, (), False, {}, 1.5]
+
+
+def square(value):
+    return value * value
+
+
+def invert(value):
+    return 1 / value
+
+
+def to_bucket(value):
+    bucket = Bucket()
+    bucket.append(value)
+    return bucket
+
+
+class MyTestCase(unittest.TestCase):
+    def test_split_list(self):
+        self.assertEqual([[1, 2], [3, 4], [5]], split_list([1, 2, 3, 4, 5], 2))
+        self.assertEqual([[1, 2], [3, 4], [5, 0]], split_list([1, 2, 3, 4, 5], 2, True, 0))
+        self.assertEqual([], split_list(None, 2))
+        self.assertRaises(ToolsException, split_list, [1], 0)
+
+    def test_chunks_views(self):
+        data = bytearray(b"abcdefg")
+        parts = list(chunks(data, 3))
+        self.assertTrue(all(isinstance(part, memoryview) for part in parts))
+        self.assertEqual([b"abc", b"def", b"g"], [part.tobytes() for part in parts])
+        data[0] = ord("x")
+        self.assertEqual(b"xbc", parts[0].tobytes())
+        values = array('i', range(5))
+        self.assertEqual([[0, 1, 2], [3, 4, -1]], [list(part) for part in chunks(values, 3, pad=True, fill_value=-1)])
+        self.assertEqual(["ab", "cd", "e-"], list(chunks("abcde", 2, pad=True, fill_value="-")))
+        self.assertEqual([b"ab", b"c\x00"], [bytes(part) for part in chunks(b"abc", 2, pad=True, fill_value=0)])
+        for sequence in (b"abc", bytearray(b"abc"), memoryview(b"abc"), values, "abc"):
+            self.assertRaises(ToolsException, list, chunks(sequence, 2, pad=True))
+        self.assertRaises(ToolsException, list, chunks(b"abc", 2, pad=True, fill_value=256))
+
+    def test_chunks_stride(self):
+        self.assertEqual([[0, 1, 2], [1, 2, 3], [2, 3, 4]], list(chunks(list(range(5)), 3, step=1)))
+        self.assertEqual([(0, 1), (4, 5), (8, 9)], list(chunks(tuple(range(10)), 2, step=4)))
+        self.assertEqual([], list(chunks([], 2)))
+        self.assertRaises(ToolsException, list, chunks([1], 2, step=0))
+
+    def test_iter_chunks(self):
+        for size, step, pad in ((3, None, False), (3, None, True), (3, 1, False), (3, 2, True), (2, 4, False),
+                                (3, 4, True), (5, 5, True), (10, 3, False)):
+            expected = [tuple(part) for part in chunks(list(range(10)), size, step, pad)]
+            self.assertEqual(expected, list(iter_chunks(iter(range(10)), size, step, pad)), (size, step, pad))
+        self.assertEqual([], list(iter_chunks(iter([]), 3)))
+
+    def test_parallel_map(self):
+        self.assertEqual([square(i) for i in range(100)], list(parallel_map(square, range(100), chunk_size=7)))
+        unordered = list(parallel_map(square, iter(range(100)), chunk_size=7, workers=3, in_flight=2, ordered=False))
+        self.assertEqual([square(i) for i in range(100)], sorted(unordered))
+        self.assertEqual([square(i) for i in range(20)],
+                         list(parallel_map(square, range(20), chunk_size=3, executor="process", workers=2)))
+        with ThreadPoolExecutor(2) as executor:
+            self.assertEqual([0, 1, 4], list(parallel_map(square, range(3), chunk_size=2, executor=executor)))
+        self.assertRaises(ToolsException, list, parallel_map(square, range(3), executor="fiber"))
+
+    def test_parallel_failure(self):
+        with self.assertRaises(ChunkException) as context:
+            list(parallel_map(invert, [1, 2, 3, 4, 0, 5], chunk_size=2))
+        self.assertEqual(2, context.exception.index)
+        self.assertEqual(4, context.exception.start)
+        self.assertIsInstance(context.exception.error, ZeroDivisionError)
+        with self.assertRaises(ChunkException) as context:
+            parallel_reduce(invert, [1, 0], operator.add, chunk_size=1, executor="process", workers=1)
+        self.assertEqual(1, context.exception.index)
+
+    def test_parallel_merge(self):
+        bucket = parallel_map(square, range(10), chunk_size=3, into=Bucket())
+        self.assertEqual((10, 285, 0, 81), (bucket.count(), bucket.total, bucket.min(), bucket.max()))
+        matrix = parallel_map(lambda value: [value, square(value)], range(4), chunk_size=3, into=Matrix())
+        self.assertEqual([2, 4], matrix.get_row(2))
+        self.assertEqual(285, parallel_reduce(square, range(10), operator.add, chunk_size=3, workers=2))
+        self.assertEqual(10, parallel_reduce(square, [], operator.add, initial=10))
+        bucket = parallel_reduce(to_bucket, range(10), Bucket.merge, chunk_size=4, ordered=False)
+        self.assertEqual((10, 45, 0, 9), (bucket.count(), bucket.total, bucket.min(), bucket.max()))
+
+    def test_prefix_matcher(self):
+        matcher = PrefixMatcher(['ab', 'abcd', 'Xy', 'ab'])
+        self.assertEqual(3, len(matcher))
+        self.assertEqual([True, True, False, False, True], matcher.match_many(['ab', 'abc', 'a', 'xy', 'Xyz']))
+        self.assertEqual('abcd', matcher.longest_match('abcde'))
+        self.assertEqual('ab', matcher.longest_match('abc'))
+        self.assertIsNone(matcher.longest_match('b'))
+        folded = PrefixMatcher(['ab', 'STRASSE'], case_sensitive=False)
+        self.assertTrue(folded.match('ABC'))
+        self.assertEqual('STRASSE', folded.longest_match('Straße 1'))
+        self.assertTrue(PrefixMatcher(['']).match(''))
+        self.assertRaises(ToolsException, PrefixMatcher, [])
+        self.assertRaises(ToolsException, matcher.match, None)
+
+    def test_starts_with_from_list(self):
+        self.assertTrue(starts_with_from_list('hello', ['x', 'he']))
+        self.assertFalse(starts_with_from_list('Hello', ['x', 'he']))
+        self.assertTrue(starts_with_from_list('Hello', ['x', 'he'], case_sensitive=False))
+        self.assertRaises(Warning, starts_with_from_list, None, ['he'])
+        self.assertRaises(Warning, starts_with_from_list, 'hello', [])
+
+    def test_prefix_matcher_non_ascii(self):
+        prefixes = ['STRASSE', 'ǆ', 'ﬁle', 'Σα', 'ı']
+        matcher = PrefixMatcher(prefixes, case_sensitive=False)
+        for string in ['straße 1', 'Ǆemal', 'FILE', 'ﬁle', 'σας', 'ΣΑΣ', 'I', 'İ', 'ss']:
+            expected = any(string.upper().startswith(prefix.upper()) for prefix in prefixes)  # the old loop
+            self.assertEqual(expected, matcher.match(string), string)
+            self.assertEqual(expected, starts_with_from_list(string, prefixes, case_sensitive=False), string)
+
+    def test_column_nones(self):
+        self.assertEqual(bytearray(value is None for value in VALUES), none_mask(VALUES))
+        self.assertEqual(bytearray(none_or_empty(value) for value in VALUES), none_or_empty_mask(VALUES))
+        self.assertEqual(count_nones(*VALUES), count_nones_in(VALUES))
+        self.assertEqual(count_not_nones(*VALUES), count_not_nones_in(iter(VALUES)))
+        values = array('d', [1.0, 2.0])
+        self.assertEqual(bytearray(2), none_mask(values))
+        self.assertEqual(bytearray(2), none_or_empty_mask(values))
+        self.assertEqual((0, 2), (count_nones_in(values), count_not_nones_in(values)))
+
+    def test_matrix_nones(self):
+        matrix = Matrix()
+        for row in ([1, None, None], [None, None, 'c'], [3, 'b', None]):
+            matrix.add_row(row)
+        self.assertEqual([1, 2, 2], matrix_none_counts(matrix))
+        self.assertEqual([count_nones(*matrix.column(i)) for i in range(3)], matrix_none_counts(matrix))
+        self.assertEqual([], matrix_none_counts(Matrix()))
+        self.assertEqual([1, 'c', 'b'], coalesce_columns(matrix, 1, 2, 0))
+        self.assertEqual([find_non_none(row) for row in matrix], coalesce_columns(matrix, 0, 1, 2))
+        self.assertRaises(ToolsException, coalesce_columns, matrix, 1, 2, raise_if_none=True)
+
+    def test_coalesce(self):
+        first, second, third = [None, 1, None, None], array('i', [5, 6, 7, 8]), [None, None, 'x', None]
+        rows = list(zip(first, third, second))
+        self.assertEqual([get_first_non_none(*row) for row in rows], coalesce(first, third, second))
+        self.assertEqual([None, 1, 'x', None], coalesce(first, third))
+        self.assertEqual([5, 6, 7, 8], coalesce(second, first))
+        self.assertEqual([], coalesce())
+        self.assertRaises(ToolsException, coalesce, first, [1])
+        self.assertRaises(ToolsException, coalesce, first, third, raise_if_none=True)
+        bucket = Bucket()  # Bucket.__eq__ fails when compared with None
+        self.assertEqual([bucket, 1], coalesce([bucket, None], [None, 1]))
+        self.assertIs(bucket, coalesce([bucket], [2], raise_if_none=True)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+This file is part of tolyn.
+
+tolyn is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import os
+import tempfile
+import unittest
+
+from graph import Trace, load_traces_from_xml, read_trace_tables
+
+TRACE_XML = """<traces>
+  <trace from="C1" actual="C1" name="trace" status="ok">
+    <components total="3">
+      <component indx="1">
+        <record id="C1"><comp_class_desc>Breaker</comp_class_desc><destn_id>C2</destn_id></record>
+        <ccount>3</ccount>
+      </component>
+      <component indx="2">
+        <record id="C2"><comp_class_desc>Cable</comp_class_desc><parent_id>C1</parent_id><destn_id>C3</destn_id></record>
+        <level>1</level>
+      </component>
+      <component indx="3">
+        <record id="C3"><comp_class_desc>Breaker</comp_class_desc><parent_id>C1</parent_id></record>
+        <level>2</level>
+      </component>
+    </components>
+    <ends total="0"/>
+  </trace>
+</traces>
+"""
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        handle, self.filename = tempfile.mkstemp(suffix=".xml")
+        with os.fdopen(handle, "wt") as file:
+            file.write(TRACE_XML)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_load_trace_from_xml(self):
+        calls = []
+        trace = Trace()
+        self.assertTrue(trace.load_trace_from_xml(self.filename, progress=lambda *args: calls.append(args), progress_every=2))
+        self.assertEqual("trace", trace.name)
+        self.assertEqual("3", trace.expected_components)
+        self.assertEqual(3, len(trace.all_components))
+        c1, c2 = trace.all_components["C1"], trace.all_components["C2"]
+        self.assertIs(c2, c1.destn_id)
+        self.assertIs(c1, c2.parent_id)
+        self.assertEqual(3, c1.ccount)
+        self.assertEqual("Breaker", c1.comp_class_desc)
+        self.assertEqual([2, 3], [call[0] for call in calls])
+
+    def test_compact_components(self):
+        trace = Trace()
+        self.assertTrue(trace.load_trace_from_xml(self.filename))
+        c1, c3 = trace.all_components["C1"], trace.all_components["C3"]
+        self.assertFalse(hasattr(c1, "__dict__"))
+        self.assertIs(c1.comp_class_desc, c3.comp_class_desc)
+
+    def test_load_traces_from_xml(self):
+        other = self.filename + ".other.xml"
+        with open(other, "wt") as file:
+            file.write(TRACE_XML.replace("C3", "C4"))
+        try:
+            registry = dict()
+            traces = load_traces_from_xml([self.filename, other, other + ".missing"], registry, processes=2)
+        finally:
+            os.remove(other)
+        self.assertEqual(3, len(traces))
+        self.assertIsNone(traces[2])
+        self.assertEqual(["C1", "C2", "C3", "C4"], sorted(registry))
+        self.assertIs(traces[0].from_comp, traces[1].from_comp)
+        self.assertIs(registry["C4"], registry["C2"].destn_id)
+        self.assertIs(registry["C1"], registry["C4"].parent_id)
+        self.assertEqual(3, registry["C1"].ccount)
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            trace = Trace()
+            self.assertTrue(trace.load_trace_cached(self.filename, cache_dir))
+            self.assertEqual(1, len(os.listdir(cache_dir)))
+            stat = os.stat(self.filename)
+            with open(self.filename, "wt") as file:  # same mtime and size, only the cache can deliver C1
+                file.write(TRACE_XML.replace("C1", "X1"))
+            os.utime(self.filename, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            cached = Trace()
+            self.assertTrue(cached.load_trace_cached(self.filename, cache_dir))
+            self.assertIs(cached.all_components["C2"], cached.all_components["C1"].destn_id)
+            self.assertEqual("Breaker", cached.all_components["C1"].comp_class_desc)
+            os.utime(self.filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            self.assertIn("X1", [row[0] for row in read_trace_tables(self.filename, cache_dir).components])
+
+    def test_cache_write_failure(self):
+        with tempfile.NamedTemporaryFile() as not_a_directory:
+            tables = read_trace_tables(self.filename, not_a_directory.name)
+        self.assertIn("C1", [row[0] for row in tables.components])
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.assertIsNone(read_trace_tables(os.path.join(cache_dir, "missing.xml"), cache_dir))
+
+    def test_topology(self):
+        trace = Trace()
+        self.assertTrue(trace.load_trace_from_xml(self.filename))
+        c1, c2, c3 = [trace.all_components[component_id] for component_id in ("C1", "C2", "C3")]
+        topology = trace.topology()
+        self.assertEqual([c2, c3], topology.downstream(c1))
+        self.assertEqual([c2, c1], topology.upstream(c3))
+        self.assertEqual([], topology.downstream(c3))
+        self.assertEqual([c2, c3], topology.children(c1))
+        self.assertEqual([c2, c3], topology.subtree(c1))
+        self.assertEqual([], topology.subtree(c3))
+        self.assertEqual([], topology.substation_components(c1))
+
+    def test_load_invalid(self):
+        with open(self.filename, "wt") as file:
+            file.write("<trace/>")
+        self.assertFalse(Trace().load_trace_from_xml(self.filename))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+"""
+This file is part of tolyn.
+
+tolyn is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import unittest
+
+from testing.unit import CALLS, ToBeTested
+
+
+@ToBeTested
+def untested(value):
+    """
+    doubles value
+    """
+    return value * 2
+
+
+class MyTestCase(unittest.TestCase):
+    def test_tracking(self):
+        record = CALLS[f"{__name__}.untested"]
+        count = record.count
+        with self.assertLogs("testing.unit", "WARNING") if count == 0 else self.assertNoLogs("testing.unit"):
+            self.assertEqual(4, untested(2))
+        with self.assertNoLogs("testing.unit"):
+            self.assertEqual(6, untested(3))
+        self.assertEqual(count + 2, record.count)
+        self.assertIsNotNone(record.first_call)
+
+    def test_wraps(self):
+        self.assertEqual("untested", untested.__name__)
+        self.assertEqual("doubles value", untested.__doc__.strip())
+
+
+if __name__ == "__main__":
+    unittest.main()
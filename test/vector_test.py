@@ -0,0 +1,65 @@
+"""
+This file is part of tolyn.
+
+tolyn is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import unittest
+
+from data.vector import Vector, sort_by_norm
+
+
+class MyTestCase(unittest.TestCase):
+    def test_init(self):
+        self.assertEqual([0, 0, 0], Vector(width=3))
+        self.assertEqual([1, 2], Vector(1, 2))
+        self.assertEqual([1, 2], Vector([1, 2]))
+
+    def test_squared_norm_cache(self):
+        v = Vector(3, 4)
+        self.assertEqual(25, v.squared_norm())
+        self.assertEqual(5.0, v.distance())
+        v[0] = 0
+        self.assertEqual(16, v.squared_norm())
+        v.append(3)
+        self.assertEqual(25, v.squared_norm())
+        v.pop()
+        self.assertEqual(16, v.squared_norm())
+        v += [3]
+        self.assertEqual(25, v.squared_norm())
+        del v[2]
+        self.assertEqual(16, v.squared_norm())
+
+    def test_iadd_generator(self):
+        v = Vector(1, 2)
+        v += (x for x in [3])
+        self.assertEqual([1, 2, 3], list(v))
+        self.assertEqual(14, v.squared_norm())
+        with self.assertRaises(TypeError):
+            v += (x for x in ["a"])
+        self.assertEqual([1, 2, 3], list(v))
+
+    def test_compare(self):
+        short = Vector(1, 1)
+        long = Vector(-2, 2)
+        self.assertTrue(short < long)
+        self.assertTrue(long >= short)
+        self.assertFalse(short > long)
+        self.assertEqual([short, long], sorted([long, short]))
+        self.assertEqual([long, short], sort_by_norm([short, long], reverse=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
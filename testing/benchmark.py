@@ -0,0 +1,199 @@
+""" 
+This file is part of tolyn.    
+
+tolyn is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+       
+"""
+
+import json
+import platform
+from datetime import datetime
+from time import perf_counter_ns
+
+from data.bucketlist import Bucket
+
+PERCENTILES = (5, 25, 75, 95)
+
+
+class BenchmarkException(Exception):
+    """
+    Benchmark related exceptions
+    """
+    pass
+
+
+class Benchmark:
+    """
+    A function to be timed.
+    A repeat calls setup() once and then the function 'number' times with the result of setup() as argument. Without a
+    fixed number, the number of calls is doubled during calibration until a repeat takes at least min_time_ns.
+    """
+
+    def __init__(self, name: str, func, setup=None, number: int = None, repeat: int = 15, warmup: int = 2, min_time_ns: int = 20_000_000) -> None:
+        """
+        :param name: Unique name, used to compare runs
+        :param func: function to time, called with the result of setup()
+        :param setup: Optional function that prepares the argument of func, it is not timed
+        :param number: Fixed number of calls per repeat, e.g. 1 for functions that change their input
+        :param repeat: Number of timed repeats
+        :param warmup: Number of repeats that are run but not recorded
+        :param min_time_ns: Minimal duration of one repeat during calibration
+        """
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.number = number
+        self.repeat = repeat
+        self.warmup = warmup
+        self.min_time_ns = min_time_ns
+
+    def __repr__(self) -> str:
+        return f"Benchmark({self.name})"
+
+    def time_once(self, number: int) -> int:
+        """
+        Time one repeat
+        :param number: number of calls
+        :return: duration of all calls in ns
+        """
+        func = self.func
+        argument = None if self.setup is None else self.setup()
+        start = perf_counter_ns()
+        for _ in range(number):
+            func(argument)
+        return perf_counter_ns() - start
+
+    def calibrate(self) -> int:
+        """
+        Determine the number of calls per repeat
+        :return: number of calls
+        """
+        if self.number is not None:
+            return self.number
+        number = 1
+        while self.time_once(number) < self.min_time_ns:
+            number *= 2
+        return number
+
+    def run(self):
+        """
+        Warm up, calibrate and time the benchmark
+        :return: BenchmarkResult
+        """
+        number = self.calibrate()
+        for _ in range(self.warmup):
+            self.time_once(number)
+        result = BenchmarkResult(self.name, number)
+        for _ in range(self.repeat):
+            result.timings.append(self.time_once(number) / number)
+        return result
+
+
+class BenchmarkResult:
+    """
+    Timings of one benchmark: the duration per call in ns for every repeat, with statistics
+    """
+
+    def __init__(self, name: str, number: int) -> None:
+        self.name = name
+        self.number = number
+        self.timings = Bucket(store_values=True)
+
+    def __repr__(self) -> str:
+        return f"{self.name}: median {self.median() / 1e3:.3f} us, MAD {self.mad() / 1e3:.3f} us, {len(self.timings)} x {self.number} calls"
+
+    def median(self) -> float:
+        return self.timings.median()
+
+    def mad(self) -> float:
+        return self.timings.mad()
+
+    def statistics(self) -> dict:
+        """
+        Get the statistics as dict, in ns per call
+        :return: dict
+        """
+        timings = self.timings
+        ret = {"number": self.number, "repeat": timings.count(), "median": timings.median(), "mad": timings.mad(),
+               "min": timings.min(), "max": timings.max(), "mean": timings.avg()}
+        for percentile in PERCENTILES:
+            ret[f"p{percentile}"] = timings.percentile(percentile)
+        return ret
+
+
+def run_benchmarks(benchmarks, report=print) -> dict:
+    """
+    Run benchmarks one after another
+    :param benchmarks: iterable of Benchmark
+    :param report: function called with every result, None for silence
+    :return: dict name -> BenchmarkResult
+    """
+    ret = dict()
+    for benchmark in benchmarks:
+        if benchmark.name in ret:
+            raise BenchmarkException(f"Duplicate benchmark name {benchmark.name}")
+        result = ret[benchmark.name] = benchmark.run()
+        if report is not None:
+            report(result)
+    return ret
+
+
+def save_results(results: dict, filename: str) -> None:
+    """
+    Write results to a JSON file
+    :param results: dict name -> BenchmarkResult
+    :param filename: full path and filename
+    """
+    data = {"meta": {"created": datetime.now().isoformat(), "python": platform.python_version(), "platform": platform.platform(), "unit": "ns"},
+            "results": {name: result.statistics() for name, result in results.items()}}
+    with open(filename, "wt") as file:
+        json.dump(data, file, indent=2)
+
+
+def load_results(filename: str) -> dict:
+    """
+    Read results from a JSON file
+    :param filename: full path and filename
+    :return: dict name -> statistics dict
+    """
+    with open(filename, "rt") as file:
+        return json.load(file)["results"]
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.1, noise: float = 3) -> list:
+    """
+    Compare two runs. A benchmark only counts as changed if its median moved by more than threshold (relative) and by
+    more than noise times the largest MAD of both runs.
+    :param baseline: dict name -> statistics dict, see load_results()
+    :param current: dict name -> statistics dict or BenchmarkResult
+    :param threshold: relative change of the median that is tolerated
+    :param noise: number of MADs that is tolerated
+    :return: list of (name, baseline median, current median, ratio, status) with status 'regression', 'improvement' or 'unchanged'
+    """
+    ret = []
+    for name, stats in current.items():
+        if isinstance(stats, BenchmarkResult):
+            stats = stats.statistics()
+        old = baseline.get(name)
+        if old is None:
+            continue
+        ratio = stats["median"] / old["median"] if old["median"] else float("inf")
+        significant = abs(stats["median"] - old["median"]) > noise * max(stats["mad"], old["mad"])
+        status = "unchanged"
+        if significant and ratio > 1 + threshold:
+            status = "regression"
+        elif significant and ratio < 1 / (1 + threshold):
+            status = "improvement"
+        ret.append((name, old["median"], stats["median"], ratio, status))
+    return ret
@@ -16,21 +16,62 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
        
 """
 
-PRINT = print
+import logging
+import os
+from functools import wraps
+from time import time
+
+ENVIRONMENT_VARIABLE = "TOLYN_TO_BE_TESTED"
+ENABLED = os.environ.get(ENVIRONMENT_VARIABLE, "1") != "0"
+LOGGER = logging.getLogger(__name__)
+
+
+class CallRecord:
+    """
+    Usage of a function that is still to be tested
+    """
+
+    __slots__ = ("name", "count", "first_call")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.count = 0
+        self.first_call = None  # epoch time of the first call
+
+    def __repr__(self) -> str:
+        return f"CallRecord({self.name}, count={self.count}, first_call={self.first_call})"
+
+
+CALLS = dict()  # qualified function name -> CallRecord
 
 
 def ToBeTested(func):
     """
-    Decorator to indicate a method is not yet tested
+    Decorator to indicate a method is not yet tested.
+    Calls are counted in CALLS and the first call is logged as a warning. If the environment variable
+    TOLYN_TO_BE_TESTED is '0' at import time, the function is returned as-is.
     :param func: function to decorate
     """
+    if not ENABLED:
+        return func
+    name = f"{func.__module__}.{func.__qualname__}"
+    record = CALLS.get(name)
+    if record is None:
+        record = CALLS[name] = CallRecord(name)
 
+    @wraps(func)
     def inner(*args, **kwargs):
         """
         to pass args and kwargs
         """
-        PRINT(f"{type(func)} {func} is still to be tested")
+        if record.count == 0:
+            record.first_call = time()
+            LOGGER.warning("%s is still to be tested", name)
+        record.count += 1
         return func(*args, **kwargs)
 
     return inner
 
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)